@@ -10,8 +10,9 @@
 
 from trytond.pool import Pool
 from .cms import (
-    CMSLink, Menu, MenuItem, BannerCategory, Banner, ArticleCategory,
-    Article, ArticleAttribute
+    CacheVersion, CMSLink, Menu, MenuItem, BannerCategory, Banner,
+    ArticleCategory, Article, ArticleURI, ArticleSummary, ArticleAttribute,
+    StaticFolder, StaticFile, Model, Language, Translation
 )
 
 
@@ -20,6 +21,7 @@ def register():
     Register classes
     """
     Pool.register(
+        CacheVersion,
         CMSLink,
         Menu,
         MenuItem,
@@ -27,6 +29,13 @@ def register():
         Banner,
         ArticleCategory,
         Article,
+        ArticleURI,
+        ArticleSummary,
         ArticleAttribute,
+        StaticFolder,
+        StaticFile,
+        Model,
+        Language,
+        Translation,
         module='nereid_cms', type_='model'
     )
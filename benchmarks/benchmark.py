@@ -0,0 +1,492 @@
+# -*- coding: utf-8 -*-
+'''
+
+    nereid_cms benchmark
+
+    Measures the hot paths of the CMS on synthetic data loaded at a
+    realistic scale into a local database, and reports the latency
+    percentiles, the number of queries per call, the cache hit rate and
+    the memory each of them adds at its peak, as reported by Linux::
+
+        python benchmarks/benchmark.py --database=cms_benchmark \
+            --config=/etc/trytond.conf --articles=100000 --languages=3
+
+    The database is created and loaded on the first run and reused by the
+    later runs, so that the numbers of successive runs can be compared.
+    The later runs must be given the sizes of the first one.
+    The database server is the one of the trytond configuration, which is
+    loaded before anything of Tryton is imported.
+
+    :copyright: (c) 2010-2013 by Openlabs Technologies & Consulting (P) Ltd.
+    :license: GPLv3, see LICENSE for more details
+
+'''
+import gc
+import sys
+import time
+import random
+from optparse import OptionParser
+
+#: The languages in which the articles are translated, after the first
+LANGUAGES = ['en_US', 'fr_FR', 'de_DE', 'es_ES', 'it_IT']
+
+WORDS = (
+    'lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod '
+    'tempor incididunt ut labore et dolore magna aliqua enim ad minim '
+    'veniam quis nostrud exercitation ullamco laboris nisi aliquip ex ea '
+    'commodo consequat duis aute irure in reprehenderit voluptate velit '
+    'esse cillum fugiat nulla pariatur excepteur sint occaecat cupidatat'
+).split()
+
+TEMPLATES = {
+    'article.jinja':
+        '<h1>{{ article.title }}</h1>{{ article.content }}'
+        '{% for attribute in article.attributes %}'
+        '{{ attribute.value }}{% endfor %}',
+    'article-category.jinja':
+        '<h1>{{ category.title }}</h1>'
+        '{% for article in articles %}'
+        '<a href="{{ article.get_absolute_url() }}">{{ article.title }}</a>'
+        '{{ article.description }}'
+        '{% endfor %}',
+}
+
+
+def get_options(args=None):
+    parser = OptionParser(usage='%prog [options]')
+    parser.add_option(
+        '--config', help='The trytond configuration file'
+    )
+    parser.add_option(
+        '--database', default='nereid_cms_benchmark',
+        help='The database to load and benchmark'
+    )
+    parser.add_option('--articles', type='int', default=100000)
+    parser.add_option('--categories', type='int', default=50)
+    parser.add_option('--languages', type='int', default=3)
+    parser.add_option('--banners', type='int', default=2000)
+    parser.add_option(
+        '--menu-depth', dest='menu_depth', type='int', default=4
+    )
+    parser.add_option(
+        '--menu-breadth', dest='menu_breadth', type='int', default=8
+    )
+    parser.add_option(
+        '--iterations', type='int', default=200,
+        help='The number of calls measured for every endpoint'
+    )
+    parser.add_option('--seed', type='int', default=42)
+    return parser.parse_args(args)[0]
+
+
+def sentence(words):
+    return ' '.join(random.choice(WORDS) for _ in xrange(words))
+
+
+def read_memory():
+    """
+    Returns the current and the peak resident memory of the process in MB,
+    read from /proc on Linux
+    """
+    memory = {}
+    with open('/proc/self/status') as status:
+        for line in status:
+            name, _, value = line.partition(':')
+            if name in ('VmRSS', 'VmHWM'):
+                memory[name] = int(value.split()[0]) / 1024.0
+    return memory['VmRSS'], memory['VmHWM']
+
+
+def reset_peak_memory():
+    """
+    Resets the peak resident memory of the process to the current one
+    """
+    with open('/proc/self/clear_refs', 'w') as clear_refs:
+        clear_refs.write('5')
+
+
+def percentile(values, percent):
+    """
+    Returns the value below which `percent` percent of the sorted
+    `values` fall
+    """
+    index = int(round(percent / 100.0 * (len(values) - 1)))
+    return values[index]
+
+
+class Benchmark(object):
+    """
+    Loads the synthetic data and measures the endpoints
+
+    :param options: The options returned by :func:`get_options`
+    """
+
+    def __init__(self, options):
+        self.options = options
+        self.languages = LANGUAGES[:options.languages]
+        self.results = []
+
+    def setup_database(self):
+        """
+        Creates the database and installs the module unless it exists
+        """
+        from trytond.config import CONFIG
+        CONFIG.update_etc(self.options.config)
+        if not CONFIG['admin_passwd']:
+            CONFIG['admin_passwd'] = 'admin'
+
+        from trytond.backend import Database
+        from trytond.protocols.dispatcher import create
+        from trytond.transaction import Transaction
+        from trytond.pool import Pool
+
+        Pool.start()
+
+        database = Database().connect()
+        cursor = database.cursor()
+        databases = database.list(cursor)
+        cursor.close()
+        if self.options.database in databases:
+            return False
+
+        create(
+            self.options.database, CONFIG['admin_passwd'], 'en_US', 'admin'
+        )
+        pool = Pool(self.options.database)
+        with Transaction().start(self.options.database, 0) as transaction:
+            Module = pool.get('ir.module.module')
+            Module.install(Module.search([('name', '=', 'nereid_cms')]))
+            transaction.cursor.commit()
+
+            InstallUpgrade = pool.get(
+                'ir.module.module.install_upgrade', type='wizard'
+            )
+            instance_id, _, _ = InstallUpgrade.create()
+            transaction.cursor.commit()
+            InstallUpgrade(instance_id).transition_upgrade()
+            InstallUpgrade.delete(instance_id)
+            transaction.cursor.commit()
+        return True
+
+    def load_data(self):
+        """
+        Loads the website, the articles with their translations, the
+        banners and the menu
+        """
+        from trytond.transaction import Transaction
+
+        random.seed(self.options.seed)
+        with Transaction().start(self.options.database, 0) as transaction:
+            self.load_website()
+            self.load_articles()
+            self.load_banners()
+            self.load_menu()
+            transaction.cursor.commit()
+
+    def load_website(self):
+        from trytond.pool import Pool
+
+        pool = Pool()
+        Currency = pool.get('currency.currency')
+        Party = pool.get('party.party')
+        Company = pool.get('company.company')
+        NereidUser = pool.get('nereid.user')
+        UrlMap = pool.get('nereid.url_map')
+        Language = pool.get('ir.lang')
+        Website = pool.get('nereid.website')
+
+        Language.write(
+            Language.search([('code', 'in', self.languages)]),
+            {'translatable': True}
+        )
+        usd, = Currency.create([{
+            'name': 'US Dollar', 'code': 'USD', 'symbol': '$',
+        }])
+        party, guest_party = Party.create([
+            {'name': 'Benchmark'}, {'name': 'Guest User'},
+        ])
+        company, = Company.create([{'party': party, 'currency': usd}])
+        guest_user, = NereidUser.create([{
+            'party': guest_party,
+            'display_name': 'Guest User',
+            'email': 'guest@example.com',
+            'password': 'password',
+            'company': company.id,
+        }])
+        url_map, = UrlMap.search([], limit=1)
+        en_us, = Language.search([('code', '=', 'en_US')])
+        Website.create([{
+            'name': 'localhost',
+            'url_map': url_map,
+            'company': company.id,
+            'application_user': 1,
+            'default_language': en_us,
+            'guest_user': guest_user,
+            'currencies': [('set', [usd.id])],
+        }])
+
+    def load_articles(self, batch_size=1000):
+        from trytond.pool import Pool
+
+        pool = Pool()
+        ArticleCategory = pool.get('nereid.cms.article.category')
+        Article = pool.get('nereid.cms.article')
+        Translation = pool.get('ir.translation')
+
+        categories = ArticleCategory.create([{
+            'title': 'Category %d' % index,
+            'unique_name': 'category-%d' % index,
+        } for index in xrange(self.options.categories)])
+
+        for start in xrange(0, self.options.articles, batch_size):
+            indexes = xrange(
+                start, min(start + batch_size, self.options.articles)
+            )
+            articles = Article.create([{
+                'title': 'Article %d %s' % (index, sentence(5)),
+                'uri': 'article-%d' % index,
+                'content': '<p>%s</p>' % sentence(800),
+                'description': sentence(40),
+                'sequence': index,
+                'category': random.choice(categories),
+                'attributes': [('create', [{
+                    'name': 'google+', 'value': sentence(1),
+                }])],
+            } for index in indexes])
+
+            vlist = []
+            for language in self.languages[1:]:
+                for article in articles:
+                    for field, value in (
+                            ('uri', '%s-%s' % (language, article.uri)),
+                            ('title', sentence(6)),
+                            ('content', '<p>%s</p>' % sentence(800))):
+                        vlist.append({
+                            'name': 'nereid.cms.article,%s' % field,
+                            'lang': language,
+                            'type': 'model',
+                            'res_id': article.id,
+                            'src': getattr(article, field),
+                            'value': value,
+                            'fuzzy': False,
+                        })
+            Translation.create(vlist)
+
+    def load_banners(self):
+        from trytond.pool import Pool
+
+        pool = Pool()
+        BannerCategory = pool.get('nereid.cms.banner.category')
+        Banner = pool.get('nereid.cms.banner')
+        Website = pool.get('nereid.website')
+
+        website, = Website.search([])
+        category, = BannerCategory.create([{
+            'name': 'home-banners', 'website': website,
+        }])
+        Banner.create([{
+            'name': 'Banner %d' % index,
+            'category': category,
+            'type': 'remote_image',
+            'remote_image_url': 'http://example.com/%d.png' % index,
+            'alternative_text': sentence(4),
+            'click_url': 'http://example.com/%d' % index,
+            'state': 'published',
+            'sequence': index,
+        } for index in xrange(self.options.banners)])
+
+    def load_menu(self):
+        """
+        Loads a tree of menu items with the given depth and breadth. The
+        items are inserted directly in the table to keep loading fast, and
+        their nested set is then built at once.
+        """
+        from trytond.transaction import Transaction
+        from trytond.pool import Pool
+
+        pool = Pool()
+        Menu = pool.get('nereid.cms.menu')
+        MenuItem = pool.get('nereid.cms.menuitem')
+        Model = pool.get('ir.model')
+        ModelField = pool.get('ir.model.field')
+        Website = pool.get('nereid.website')
+        cursor = Transaction().cursor
+
+        def insert(name, parent, sequence):
+            cursor.execute(
+                'INSERT INTO "%s" (title, unique_name, parent, sequence, '
+                'active, use_url_builder, values_to_build, "left", "right", '
+                'create_uid, create_date) VALUES (%%s, %%s, %%s, %%s, %%s, '
+                '%%s, %%s, 0, 0, 0, CURRENT_TIMESTAMP)' % MenuItem._table,
+                (name.title(), name, parent, sequence, True, False, '{ }')
+            )
+            return cursor.lastid()
+
+        level = [(insert('root', None, 1), 'root')]
+        for _ in xrange(self.options.menu_depth):
+            next_level = []
+            for parent_id, parent_name in level:
+                for index in xrange(self.options.menu_breadth):
+                    name = '%s-%d' % (parent_name, index)
+                    next_level.append((insert(name, parent_id, index), name))
+            level = next_level
+        MenuItem._rebuild_tree('parent', False, 0)
+
+        model, = Model.search([('model', '=', MenuItem.__name__)])
+
+        def field(name):
+            return ModelField.search([
+                ('model', '=', model.id), ('name', '=', name),
+            ])[0]
+
+        website, = Website.search([])
+        Menu.create([{
+            'name': 'Main Menu',
+            'unique_identifier': 'main-menu',
+            'website': website,
+            'model': model,
+            'children_field': field('child'),
+            'uri_field': field('unique_name'),
+            'title_field': field('title'),
+            'identifier_field': field('unique_name'),
+        }])
+
+    def get_app(self):
+        import jinja2
+        from nereid import Nereid
+        from nereid.contrib.locale import Babel
+        from trytond.modules.nereid_cms.instrumentation import \
+            install_instrumentation
+
+        class BenchmarkApp(Nereid):
+            def load_backend(self):
+                # The classes were registered when the database was set
+                # up and cannot be registered twice
+                from trytond.backend import Database
+                from trytond.pool import Pool
+
+                self._database = Database(self.database_name).connect()
+                self._pool = Pool(self.database_name)
+                self._pool.init()
+
+        app = BenchmarkApp()
+        app.config.update(
+            DATABASE_NAME=self.options.database,
+            CACHE_TYPE='werkzeug.contrib.cache.SimpleCache',
+        )
+        # The loaders of the module template folders are loaded lazily,
+        # and the templates of the benchmark take precedence over them
+        app.jinja_loader.loaders
+        app.jinja_loader._loaders.insert(0, jinja2.DictLoader(TEMPLATES))
+        app.initialise()
+        Babel(app)
+        install_instrumentation(app)
+        return app
+
+    def measure(self, name, function):
+        """
+        Calls `function` as many times as asked for and records the
+        latencies, the queries, the cache lookups and the memory that the
+        calls added at their peak
+        """
+        from trytond.modules.nereid_cms.instrumentation import \
+            query_count, cache_counts
+
+        gc.collect()
+        reset_peak_memory()
+        memory = read_memory()[0]
+        queries = query_count()
+        hits, misses = cache_counts()
+        latencies = []
+        for _ in xrange(self.options.iterations):
+            start = time.time()
+            function()
+            latencies.append((time.time() - start) * 1000)
+        queries = query_count() - queries
+        hits = cache_counts()[0] - hits
+        misses = cache_counts()[1] - misses
+        latencies.sort()
+        self.results.append((
+            name,
+            percentile(latencies, 50),
+            percentile(latencies, 90),
+            percentile(latencies, 99),
+            float(queries) / self.options.iterations,
+            100.0 * hits / (hits + misses) if hits + misses else 0.0,
+            read_memory()[1] - memory,
+        ))
+
+    def run(self):
+        from trytond.pool import Pool
+
+        app = self.get_app()
+        client = app.test_client()
+        pool = Pool(self.options.database)
+        Menu = pool.get('nereid.cms.menu')
+        Banner = pool.get('nereid.cms.banner')
+
+        def get(paths):
+            def call():
+                response = client.get(random.choice(paths))
+                assert response.status_code == 200, response.status
+            return call
+
+        def in_request(function):
+            def call():
+                with app.transaction('localhost'):
+                    with app.test_request_context('/en_US/'):
+                        function()
+            return call
+
+        with app.transaction('localhost'):
+            banner_ids = map(int, Banner.search([], limit=20))
+
+        articles = xrange(self.options.articles)
+        self.measure('Article.render', get([
+            '/%s/article/%sarticle-%d' % (
+                language, language + '-' if language != 'en_US' else '',
+                random.choice(articles)
+            ) for language in self.languages for _ in xrange(100)
+        ]))
+        self.measure('ArticleCategory.render', get([
+            '/en_US/article-category/category-%d' % index
+            for index in xrange(self.options.categories)
+        ]))
+        self.measure('Article.sitemap_index', get([
+            '/en_US/sitemaps/article-index.xml'
+        ]))
+        self.measure('Article.sitemap', get([
+            '/en_US/sitemaps/article-%d.xml' % page
+            for page in xrange(1, (self.options.articles + 999) / 1000 + 1)
+        ]))
+        self.measure('Menu.menu_for', in_request(
+            lambda: Menu.menu_for('main-menu', 'root')
+        ))
+        self.measure('Menu.menu_for depth 2', in_request(
+            lambda: Menu.menu_for('main-menu', 'root', max_depth=2)
+        ))
+        self.measure('Banner.get_html', in_request(
+            lambda: Banner.get_html_many(Banner.browse(banner_ids))
+        ))
+
+    def report(self, stream=sys.stdout):
+        stream.write('%-24s %9s %9s %9s %9s %9s %9s\n' % (
+            'endpoint', 'p50 ms', 'p90 ms', 'p99 ms', 'queries', 'hits %',
+            'peak +MB'
+        ))
+        for result in self.results:
+            stream.write(
+                '%-24s %9.2f %9.2f %9.2f %9.1f %9.1f %9.1f\n' % result
+            )
+
+
+def main(args=None):
+    benchmark = Benchmark(get_options(args))
+    if benchmark.setup_database():
+        benchmark.load_data()
+    benchmark.run()
+    benchmark.report()
+
+
+if __name__ == '__main__':
+    main()
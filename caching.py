@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+'''
+
+    Nereid CMS caching helpers
+
+    :copyright: (c) 2010-2013 by Openlabs Technologies & Consulting (P) Ltd.
+    :license: GPLv3, see LICENSE for more details
+
+'''
+from datetime import datetime
+from functools import wraps
+
+from nereid import current_app, request, cache
+from flask import has_request_context, session
+from werkzeug.http import is_resource_modified
+
+from trytond.transaction import Transaction
+
+from .instrumentation import record_cache_lookup
+
+__all__ = [
+    'RequestMemo', 'get_request_memo', 'memoize_for_request',
+    'get_cached_response', 'cache_response', 'get_not_modified_response',
+    'set_validators', 'parse_timestamp',
+]
+
+
+class RequestMemo(dict):
+    """
+    A dictionary of the values memoized during a request, along with the
+    number of lookups that were answered from it (`hits`) and the number
+    that had to be computed (`misses`). The lookups are also reported
+    with the other cache lookups of the request by the instrumentation.
+    """
+
+    def __init__(self):
+        super(RequestMemo, self).__init__()
+        self.hits = 0
+        self.misses = 0
+
+
+def get_request_memo():
+    """
+    Returns the :class:`RequestMemo` of the current request, creating it
+    on first use. Outside of a request `None` is returned.
+    """
+    if not has_request_context():
+        return None
+    memo = getattr(request, 'nereid_cms_memo', None)
+    if memo is None:
+        memo = request.nereid_cms_memo = RequestMemo()
+    return memo
+
+
+def memoize_for_request(function):
+    """
+    Memoizes the return value of `function` for the rest of the request.
+    The values are keyed on the function, its arguments, the website and
+    the language. Calls made outside of a request, or with arguments that
+    cannot be hashed, are not memoized.
+
+    This is meant for the helpers returned by the context processors,
+    which templates tend to call repeatedly with the same arguments.
+    """
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        memo = get_request_memo()
+        if memo is None:
+            return function(*args, **kwargs)
+
+        key = (
+            getattr(function, 'im_self', None), function.__name__,
+            args, tuple(sorted(kwargs.items())),
+            request.nereid_website.id, Transaction().language,
+        )
+        try:
+            rv = memo[key]
+        except KeyError:
+            memo.misses += 1
+            record_cache_lookup(False)
+            rv = memo[key] = function(*args, **kwargs)
+        except TypeError:
+            # Unhashable arguments
+            return function(*args, **kwargs)
+        else:
+            memo.hits += 1
+            record_cache_lookup(True)
+        return rv
+    return wrapper
+
+
+def get_cached_response(cache_key):
+    """
+    Returns the response stored in the cache under `cache_key` by
+    :func:`cache_response`, or `None` if there is none. The response is a
+    `304 Not Modified` if the client already has it. Visitors with data in
+    their session are not answered from the cache.
+    """
+    if session:
+        return None
+    cached = cache.get(cache_key)
+    record_cache_lookup(cached is not None)
+    if cached is None:
+        return None
+    data, mimetype, etag, last_modified = cached
+    rv = get_not_modified_response(etag, last_modified)
+    if rv is not None:
+        return rv
+    return set_validators(
+        current_app.response_class(data, mimetype=mimetype),
+        etag, last_modified
+    )
+
+
+def cache_response(cache_key, rv, timeout):
+    """
+    Stores the response for the return value `rv` of a view in the cache
+    under `cache_key`, along with its ETag and last modification time.
+    Responses without validators get an ETag computed from their body and
+    the time of caching as their last modification. Only successful
+    responses rendered for an empty session are cached, as the page may
+    show data of the session like flashed messages. Returns the response
+    to be sent.
+    """
+    response = current_app.make_response(rv)
+    if response.status_code != 200 or session or session.modified:
+        return response
+
+    response.add_etag(overwrite=False)
+    if response.last_modified is None:
+        response.last_modified = datetime.utcnow().replace(microsecond=0)
+    etag = response.get_etag()[0]
+    cache.set(cache_key, (
+        response.get_data(), response.mimetype,
+        etag, response.last_modified,
+    ), timeout)
+    return get_not_modified_response(etag, response.last_modified) or \
+        response
+
+
+def get_not_modified_response(etag, last_modified):
+    """
+    Returns a `304 Not Modified` response if the `If-None-Match` header
+    of the request shows that the client already has the resource
+    identified by `etag`, otherwise `None`. Only GET and HEAD requests
+    are answered. `If-Modified-Since` is ignored, as deletions do not
+    move `last_modified` forward.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    if is_resource_modified(request.environ, etag=etag):
+        return None
+    response = current_app.response_class(status=304)
+    return set_validators(response, etag, last_modified)
+
+
+def set_validators(rv, etag, last_modified):
+    """
+    Returns the response for the return value `rv` of a view with the
+    given ETag and Last-Modified headers.
+    """
+    response = current_app.make_response(rv)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    return response
+
+
+def parse_timestamp(value):
+    """
+    Returns the timestamp `value` fetched with a raw SQL query as a
+    datetime. SQLite does not convert the results of aggregates like
+    `MAX(write_date)` and returns them as strings.
+    """
+    if isinstance(value, basestring):
+        if '.' in value:
+            return datetime.strptime(value[:26], '%Y-%m-%d %H:%M:%S.%f')
+        return datetime.strptime(value[:19], '%Y-%m-%d %H:%M:%S')
+    return value
@@ -7,25 +7,475 @@
     :license: GPLv3, see LICENSE for more details
 
 '''
+import json
+import math
+import datetime
 from string import Template
+from hashlib import md5
 
 from nereid import render_template, current_app, cache, request
 from nereid.helpers import slugify, url_for, key_from_list
-from nereid.contrib.pagination import Pagination
-from nereid.contrib.sitemap import SitemapIndex, SitemapSection
+from flask import has_request_context, session
 from werkzeug.exceptions import NotFound, InternalServerError
+import lxml.html
+from lxml import etree
 
 from trytond.pyson import Eval, Not, Equal, Bool, In
 from trytond.model import ModelSQL, ModelView, fields
 from trytond.transaction import Transaction
-from trytond.pool import Pool
+from trytond.pool import Pool, PoolMeta
+from trytond.backend import TableHandler
+from trytond.cache import Cache
+from trytond.exceptions import UserError
+
+from .pagination import KeysetPagination
+from .sitemap import CMSSitemapIndex, CMSSitemapSection
+from .caching import memoize_for_request, get_cached_response, \
+    cache_response, get_not_modified_response, set_validators, \
+    parse_timestamp
+from .instrumentation import instrument, measure, record_cache_lookup
 
 __all__ = [
-    'CMSLink', 'Menu', 'MenuItem', 'BannerCategory', 'Banner',
-    'ArticleCategory', 'Article', 'ArticleAttribute',
+    'CacheVersion', 'CMSLink', 'Menu', 'MenuItem', 'BannerCategory',
+    'Banner', 'ArticleCategory', 'Article', 'ArticleURI', 'ArticleSummary',
+    'ArticleAttribute', 'StaticFolder', 'StaticFile', 'Model', 'Language',
+    'Translation',
 ]
 
 
+class CacheVersion(ModelSQL):
+    """
+    Nereid CMS Cache Version
+
+    A version number per name, usually a model, which is a part of the
+    keys of the content cached from its records.
+    """
+    __name__ = 'nereid.cms.cache.version'
+
+    name = fields.Char('Name', required=True, select=True)
+    version = fields.Integer('Version', required=True)
+
+    @classmethod
+    def __setup__(cls):
+        super(CacheVersion, cls).__setup__()
+        cls._sql_constraints += [
+            ('name_uniq', 'UNIQUE(name)',
+                'The name of the cache version must be unique.'),
+        ]
+
+    @staticmethod
+    def default_version():
+        return 1
+
+    @classmethod
+    def get_versions(cls):
+        """
+        Returns a dictionary of the versions by name. Within a request the
+        versions are read from the database only once.
+        """
+        if has_request_context() and \
+                hasattr(request, 'nereid_cms_cache_versions'):
+            return request.nereid_cms_cache_versions
+
+        cursor = Transaction().cursor
+        cursor.execute('SELECT name, version FROM "%s"' % cls._table)
+        versions = dict(cursor.fetchall())
+
+        if has_request_context():
+            request.nereid_cms_cache_versions = versions
+        return versions
+
+    @classmethod
+    def get_version(cls, name):
+        """
+        Returns the current version of the given name
+        """
+        return cls.get_versions().get(name, 0)
+
+    @classmethod
+    def create_missing(cls, names):
+        """
+        Creates the versions of the given names which do not exist yet
+        """
+        cursor = Transaction().cursor
+
+        for name in set(names):
+            cursor.execute(
+                'INSERT INTO "%s" (name, version, create_uid, create_date) '
+                'SELECT %%s, 1, %%s, %%s WHERE NOT EXISTS '
+                '(SELECT 1 FROM "%s" WHERE name = %%s)' % (
+                    cls._table, cls._table
+                ), (name, Transaction().user, datetime.datetime.now(), name)
+            )
+
+    @classmethod
+    def bump(cls, names):
+        """
+        Increments the version of the given names
+
+        :param names: A list of names, usually the names of models
+        """
+        cursor = Transaction().cursor
+
+        names = list(set(names))
+        for i in range(0, len(names), cursor.IN_MAX):
+            sub_names = names[i:i + cursor.IN_MAX]
+            cursor.execute(
+                'UPDATE "%s" SET version = version + 1 WHERE name IN (%s)' % (
+                    cls._table, ', '.join(['%s'] * len(sub_names))
+                ), sub_names
+            )
+        # The versions of the models are created when the module is
+        # updated, only the other names can be missing
+        cls.create_missing(set(names) - set(cls.get_versions()))
+
+        if has_request_context() and \
+                hasattr(request, 'nereid_cms_cache_versions'):
+            del request.nereid_cms_cache_versions
+
+
+class CacheVersionMixin(object):
+    """
+    Bumps the cache versions of the records whenever they are created,
+    modified or deleted.
+    """
+
+    @classmethod
+    def __register__(cls, module_name):
+        CacheVersion = Pool().get('nereid.cms.cache.version')
+
+        super(CacheVersionMixin, cls).__register__(module_name)
+        CacheVersion.create_missing([cls.__name__])
+
+    @classmethod
+    def get_cache_version_names(cls, records):
+        """
+        Returns the names of the cache versions of the given records
+        """
+        return [cls.__name__]
+
+    @classmethod
+    def invalidate_cache(cls):
+        CacheVersion = Pool().get('nereid.cms.cache.version')
+        CacheVersion.bump([cls.__name__])
+
+    @classmethod
+    def create(cls, vlist):
+        CacheVersion = Pool().get('nereid.cms.cache.version')
+
+        records = super(CacheVersionMixin, cls).create(vlist)
+        CacheVersion.bump(cls.get_cache_version_names(records))
+        return records
+
+    @classmethod
+    def write(cls, records, values):
+        CacheVersion = Pool().get('nereid.cms.cache.version')
+
+        names = cls.get_cache_version_names(records)
+        super(CacheVersionMixin, cls).write(records, values)
+        CacheVersion.bump(names + cls.get_cache_version_names(records))
+
+    @classmethod
+    def delete(cls, records):
+        CacheVersion = Pool().get('nereid.cms.cache.version')
+
+        names = cls.get_cache_version_names(records)
+        super(CacheVersionMixin, cls).delete(records)
+        CacheVersion.bump(names)
+
+
+class CompositeIndexMixin(object):
+    """
+    Creates the composite indexes listed in :attr:`_composite_indexes` on
+    the table of the model when the module is installed or updated.
+
+    Use :meth:`missing_indexes` to check that the indexes exist, for
+    example after an upgrade.
+    """
+
+    #: A list of (columns, where) tuples giving the columns of every index
+    #: and an SQL condition which makes it a partial index, or `None`
+    _composite_indexes = []
+
+    @classmethod
+    def __register__(cls, module_name):
+        super(CompositeIndexMixin, cls).__register__(module_name)
+
+        cursor = Transaction().cursor
+        table = TableHandler(cursor, cls, module_name)
+        for columns, where in cls._composite_indexes:
+            if where is None:
+                table.index_action(list(columns), 'add')
+                continue
+            index_name = cls.get_index_name(columns, where)
+            if index_name in table._indexes:
+                continue
+            # Drop the index of an older condition on the same columns
+            prefix = cls.get_index_name(columns)[:-len('index')] + 'partial_'
+            for name in table._indexes:
+                if name.startswith(prefix):
+                    cursor.execute('DROP INDEX "%s"' % name)
+            cursor.execute(
+                'CREATE INDEX "%s" ON "%s" (%s) WHERE %s' % (
+                    index_name, cls._table,
+                    ', '.join('"%s"' % column for column in columns),
+                    where,
+                )
+            )
+
+    @classmethod
+    def get_index_name(cls, columns, where=None):
+        """
+        Returns the name of the index on the given columns, following the
+        naming of the indexes created by Tryton. The names of partial indexes
+        include a digest of their condition.
+        """
+        suffix = ['partial', md5(where).hexdigest()[:8]] if where else []
+        return '_'.join([cls._table] + list(columns) + suffix) + '_index'
+
+    @classmethod
+    def missing_indexes(cls):
+        """
+        Returns the names of the indexes of :attr:`_composite_indexes`
+        which do not exist in the database
+        """
+        table = TableHandler(Transaction().cursor, cls)
+        return [
+            cls.get_index_name(columns, where)
+            for columns, where in cls._composite_indexes
+            if cls.get_index_name(columns, where) not in table._indexes
+        ]
+
+
+class URIRoutingMixin(object):
+    """
+    Resolves the uris of the pages of the model to record ids with a
+    routing table, the `_routes_cache` of the model, kept in the memory of
+    every worker and invalidated by :meth:`invalidate_routes`.
+    """
+
+    @classmethod
+    def __register__(cls, module_name):
+        CacheVersion = Pool().get('nereid.cms.cache.version')
+
+        super(URIRoutingMixin, cls).__register__(module_name)
+        CacheVersion.create_missing([cls.get_routes_version_name()])
+
+    @classmethod
+    def get_routes_version_name(cls):
+        return '%s.routes' % cls.__name__
+
+    @classmethod
+    def invalidate_routes(cls):
+        """
+        Invalidates the routing tables of all the workers
+        """
+        CacheVersion = Pool().get('nereid.cms.cache.version')
+        CacheVersion.bump([cls.get_routes_version_name()])
+
+    @classmethod
+    def lookup_uri(cls, uri):
+        """
+        Returns the ids of the records, active or not, whose uri field is
+        `uri` in the database
+        """
+        with Transaction().set_context(active_test=False):
+            return map(int, cls.search([('uri', '=', uri)]))
+
+    @classmethod
+    def resolve_uri(cls, uri):
+        """
+        Returns the ids of the records with the given uri in the language
+        of the context, from the routing table if possible
+        """
+        CacheVersion = Pool().get('nereid.cms.cache.version')
+
+        version = CacheVersion.get_version(cls.get_routes_version_name())
+        key = (
+            request.nereid_website.id if has_request_context() else None,
+            Transaction().language, uri,
+        )
+        route = cls._routes_cache.get(key)
+        record_cache_lookup(route is not None and route[0] == version)
+        if route is not None and route[0] == version:
+            return route[1]
+
+        ids = cls.lookup_uri(uri)
+        if ids:
+            cls._routes_cache.set(key, (version, ids))
+        return ids
+
+    @classmethod
+    def search_by_uri(cls, uri):
+        """
+        Returns the active records with the given uri in the language of
+        the context
+        """
+        ids = cls.resolve_uri(uri)
+        if not ids:
+            return []
+        return cls.search([('id', 'in', ids)])
+
+
+class ResponseCacheMixin(object):
+    """
+    Caches the responses of the render method for anonymous visitors and
+    answers conditional requests for them.
+
+    The cache is opt-in: it is enabled by setting
+    :attr:`response_cache_timeout`. The cached responses are keyed on the
+    arguments of the view, the language and the website. They are
+    invalidated by changes to any of the models listed in
+    :attr:`response_cache_models`. Visitors with data in their session,
+    like flashed messages or a CSRF token, neither get nor store cached
+    responses, as the layout may show it.
+
+    Every rendered response carries an ETag and a Last-Modified header
+    computed by :meth:`get_validators` from the modification times of the
+    rendered record and the records shown with it, so that clients which
+    already have the page get a `304 Not Modified` before the template is
+    rendered. The content that the layout fetches on its own is only
+    tracked through the cache versions of :attr:`layout_cache_models`,
+    and deploys of new templates through the `NEREID_CMS_TEMPLATE_VERSION`
+    setting of the application, which should change with every deploy.
+    Subclasses can extend :meth:`get_modification_stamps` for the rest.
+    """
+
+    #: The time in seconds for which rendered responses are cached, or
+    #: `None` to not cache them
+    response_cache_timeout = None
+
+    #: The models whose changes invalidate the cached responses
+    response_cache_models = []
+
+    #: The models which the layout of every page shows through the context
+    #: processors, whose changes invalidate the cached responses and the
+    #: ETags of all the pages
+    layout_cache_models = [
+        'nereid.cms.menu', 'nereid.cms.menuitem', 'nereid.cms.banner',
+    ]
+
+    @classmethod
+    def get_layout_versions(cls):
+        """
+        Returns the version of the templates and the cache versions of
+        :attr:`layout_cache_models`, which are read along with the other
+        cache versions of the request
+        """
+        CacheVersion = Pool().get('nereid.cms.cache.version')
+        return [
+            current_app.config.get('NEREID_CMS_TEMPLATE_VERSION'),
+            [CacheVersion.get_version(name)
+                for name in cls.layout_cache_models],
+        ]
+
+    @classmethod
+    def get_response_cache_key(cls, *args):
+        """
+        Returns the key under which the response of the render method for
+        the given arguments is cached, or `None` if the response must not
+        be cached. Only anonymous GET requests are cached, and the key is
+        built without any ORM query.
+        """
+        if cls.response_cache_timeout is None or \
+                request.method != 'GET' or not request.is_guest_user:
+            return None
+
+        CacheVersion = Pool().get('nereid.cms.cache.version')
+        return key_from_list([
+            Transaction().cursor.dbname,
+            Transaction().language,
+            request.host,
+            args,
+            [CacheVersion.get_version(name)
+                for name in cls.response_cache_models],
+            cls.get_layout_versions(),
+            '%s.render' % cls.__name__,
+        ])
+
+    @staticmethod
+    def get_table_stamps(Model, field, values, path=()):
+        """
+        Returns modification stamps for the records of `Model` whose
+        `field` is each of `values`, keyed on the value: their number, so
+        that deletions are noticed, and the time of the latest change to
+        any of them. A single grouped query is used for every
+        `cursor.IN_MAX` values, however many records there are.
+
+        :param path: The names of Many2One fields followed from these
+            records, to stamp the records they lead to instead
+        """
+        cursor = Transaction().cursor
+
+        joins, alias = '', 't0'
+        Target = Model
+        for index, name in enumerate(path, 1):
+            Target = Pool().get(Target._fields[name].model_name)
+            joins += ' JOIN "%s" AS t%d ON t%d.id = %s."%s"' % (
+                Target._table, index, index, alias, name
+            )
+            alias = 't%d' % index
+
+        values = list(set(values))
+        stamps = dict((value, (Target.__name__, 0, None)) for value in values)
+        for i in range(0, len(values), cursor.IN_MAX):
+            sub_values = values[i:i + cursor.IN_MAX]
+            cursor.execute(
+                'SELECT t0."%s", COUNT(DISTINCT %s.id), '
+                'MAX(COALESCE(%s.write_date, %s.create_date)) '
+                'FROM "%s" AS t0%s WHERE t0."%s" IN (%s) '
+                'GROUP BY t0."%s"' % (
+                    field, alias, alias, alias, Model._table, joins, field,
+                    ', '.join(['%s'] * len(sub_values)), field,
+                ), sub_values
+            )
+            for value, count, timestamp in cursor.fetchall():
+                stamps[value] = (
+                    Target.__name__, count, parse_timestamp(timestamp)
+                )
+        return stamps
+
+    @classmethod
+    def get_modification_stamps(cls, records):
+        """
+        Returns a list of (model, id, timestamp) tuples for each record and
+        the records shown along with it on its rendered page, keyed on the
+        id of the record, where the timestamp is the time of the last
+        change to the record. The stamps of all the records are read
+        together.
+        """
+        return dict(
+            (record.id, [
+                (cls.__name__, record.id,
+                    record.write_date or record.create_date)
+            ]) for record in records
+        )
+
+    @classmethod
+    def get_validators(cls, records):
+        """
+        Returns the ETag and the Last-Modified time of the rendered page of
+        each record keyed on its id, without rendering them. The ETag also
+        depends on the template, the layout, the language and the logged
+        in user.
+        """
+        stamps = cls.get_modification_stamps(records)
+        layout_versions = cls.get_layout_versions()
+        res = {}
+        for record in records:
+            etag = md5(repr([
+                record.template, layout_versions,
+                Transaction().language, session.get('user'),
+                stamps[record.id],
+            ])).hexdigest()
+            last_modified = max(
+                stamp[2] for stamp in stamps[record.id]
+                if stamp[2] is not None
+            )
+            res[record.id] = (etag, last_modified.replace(microsecond=0))
+        return res
+
+
 class CMSLink(ModelSQL, ModelView):
     """
     CMS link
@@ -38,6 +488,12 @@ class CMSLink(ModelSQL, ModelView):
     model = fields.Selection('models_get', 'Model', required=True, select=True)
     priority = fields.Integer('Priority')
 
+    #: The selections of links and models by language, kept in the memory
+    #: of every worker along with the cache version they were built at,
+    #: which is bumped when the links or the models change
+    _links_cache = Cache('nereid.cms.link.links_get', context=False)
+    _models_cache = Cache('nereid.cms.link.models_get', context=False)
+
     @classmethod
     def __setup__(cls):
         super(CMSLink, cls).__setup__()
@@ -47,19 +503,170 @@ class CMSLink(ModelSQL, ModelView):
     def default_priority():
         return 5
 
-    @staticmethod
-    def models_get():
+    @classmethod
+    def get_selection(cls, name, build):
+        """
+        Returns the selection `name`, `links` or `models`, from the cache of
+        the worker if it was built at the current version, otherwise from
+        `build`
+        """
+        CacheVersion = Pool().get('nereid.cms.cache.version')
+
+        cache = getattr(cls, '_%s_cache' % name)
+        version = CacheVersion.get_version('%s.%s' % (cls.__name__, name))
+        cached = cache.get(Transaction().language)
+        if cached is not None and cached[0] == version:
+            return list(cached[1])
+        res = build()
+        cache.set(Transaction().language, (version, res))
+        return list(res)
+
+    @classmethod
+    def invalidate_selections(cls, names):
+        """
+        Invalidates the given selections, `links` or `models`, in all the
+        workers
+        """
+        CacheVersion = Pool().get('nereid.cms.cache.version')
+        CacheVersion.bump(['%s.%s' % (cls.__name__, name) for name in names])
+
+    @classmethod
+    def models_get(cls):
         Model = Pool().get('ir.model')
-        res = []
-        for model in Model.search([]):
-            res.append((model.model, model.name))
-        return res
 
+        def build():
+            return [(model.model, model.name) for model in Model.search([])]
+        return cls.get_selection('models', build)
+
+    @classmethod
+    def links_get(cls):
+        """
+        Returns the selection of the models which reference fields of the
+        CMS can link to, along with an empty choice
+        """
+        def build():
+            return [('', '')] + [(x.model, x.name) for x in cls.search([])]
+        return cls.get_selection('links', build)
+
+    @classmethod
+    def resolve_references(cls, references):
+        """
+        Returns a dictionary of the URL of the record referred to by each
+        of the given references, keyed on their `model,id` value. The
+        records of a model are all read together: the uri of models with
+        a `uri` field is read in a single query and the URL built to their
+        `render` method, while the URLs of other models are built by
+        their `get_absolute_url` method. References to records which do
+        not exist, or are inactive, are left out.
+
+        :param references: An iterable of reference values, either
+                `model,id` strings or active records
+        """
+        pool = Pool()
+
+        ids_by_model = {}
+        for reference in references:
+            if not reference:
+                continue
+            if isinstance(reference, basestring):
+                model, id = reference.split(',')
+            else:
+                model, id = reference.__name__, reference.id
+            if model and int(id) > 0:
+                ids_by_model.setdefault(model, set()).add(int(id))
+
+        rv = {}
+        for model, ids in ids_by_model.iteritems():
+            Model = pool.get(model)
+            domain = [('id', 'in', list(ids))]
+            if 'uri' in Model._fields:
+                for values in Model.search_read(domain, fields_names=['uri']):
+                    rv['%s,%d' % (model, values['id'])] = url_for(
+                        '%s.render' % model, uri=values['uri']
+                    )
+            elif hasattr(Model, 'get_absolute_url'):
+                for record in Model.search(domain):
+                    rv['%s,%d' % (model, record.id)] = \
+                        record.get_absolute_url()
+        return rv
+
+    @classmethod
+    def get_reference_urls(cls, records, field_name='reference'):
+        """
+        Returns a dictionary of the URL of the record referred to by the
+        reference field of each of the given records, keyed on their id.
+        The reference fields are read together and resolved with
+        :meth:`resolve_references`, for example to list articles along
+        with their links::
+
+            {% set urls = get_reference_urls(articles.items()) %}
+            {% for article in articles %}
+                <a href="{{ urls[article.id] }}">{{ article.title }}</a>
+            {% endfor %}
+
+        :param records: A list of active records of the same model
+        :param field_name: The name of the reference field
+        """
+        if not records:
+            return {}
+        Model = Pool().get(records[0].__name__)
+        values = Model.read(map(int, records), [field_name])
+        urls = cls.resolve_references(
+            value[field_name] for value in values
+        )
+        return dict(
+            (value['id'], urls.get(value[field_name])) for value in values
+        )
+
+    @classmethod
+    def context_processor(cls):
+        """This function will be called by nereid to update
+        the template context. Must return a dictionary that the context
+        will be updated with.
+
+        This function is registered with nereid.template.context_processor
+        in xml code
+        """
+        return {
+            'get_reference_urls': cls.get_reference_urls,
+        }
+
+    @classmethod
+    def create(cls, vlist):
+        links = super(CMSLink, cls).create(vlist)
+        cls.invalidate_selections(['links'])
+        return links
+
+    @classmethod
+    def write(cls, links, values):
+        result = super(CMSLink, cls).write(links, values)
+        cls.invalidate_selections(['links'])
+        return result
+
+    @classmethod
+    def delete(cls, links):
+        result = super(CMSLink, cls).delete(links)
+        cls.invalidate_selections(['links'])
+        return result
 
-class Menu(ModelSQL, ModelView):
+
+class Menu(CacheVersionMixin, ModelSQL, ModelView):
     "Nereid CMS Menu"
     __name__ = 'nereid.cms.menu'
 
+    #: The time in seconds for which a generated menu tree is cached.
+    #: Changes to the menus and the menu items invalidate the cached trees
+    #: immediately, so this only bounds the staleness of trees built on
+    #: other models, which have to call :meth:`invalidate_cache` on their
+    #: own changes.
+    cache_timeout = 24 * 60 * 60
+
+    #: The menu trees decoded by this worker, keyed on the digest of their
+    #: serialized form
+    _trees_cache = Cache(
+        'nereid.cms.menu.trees', size_limit=100, context=False
+    )
+
     name = fields.Char(
         'Name', required=True,
         on_change=['name', 'unique_identifier'],
@@ -113,6 +720,14 @@ class Menu(ModelSQL, ModelView):
         """
         return True
 
+    @classmethod
+    def __register__(cls, module_name):
+        super(Menu, cls).__register__(module_name)
+
+        # The UNIQUE constraint already indexes these columns
+        table = TableHandler(Transaction().cursor, cls, module_name)
+        table.index_action(['unique_identifier', 'website'], 'remove')
+
     @classmethod
     def __setup__(cls):
         super(Menu, cls).__setup__()
@@ -121,43 +736,158 @@ class Menu(ModelSQL, ModelView):
                 'The Unique Identifier of the Menu must be unique.'),
         ]
 
-    def _menu_item_to_dict(self, menu_item):
+    def _get_branch(self, root_id, path):
         """
-        :param menu_item: Active record of the menu item
+        Returns the ids of the menu item under the root menu item whose
+        identifier field has the value `path` and of its ancestors up to
+        the root, or only the id of the root if there is no such item.
+
+        :param root_id: The ID of the root menu item
+        :param path: The value of the identifier field of the menu item
         """
-        if hasattr(menu_item, 'reference') and getattr(menu_item, 'reference'):
-            model, id = getattr(menu_item, 'reference').split(',')
-            if int(id):
-                reference, = Pool().get(model)(int(id))
-                uri = url_for(
-                    '%s.render' % reference.__name__, uri=reference.uri
-                )
-            else:
-                uri = getattr(menu_item, self.uri_field.name)
-        else:
-            uri = getattr(menu_item, self.uri_field.name)
-        return {
-            'name': getattr(menu_item, self.title_field.name),
-            'uri': uri,
-        }
+        MenuItem = Pool().get(self.model.model)
+        parent_field = MenuItem._fields[self.children_field.name].field
+        cursor = Transaction().cursor
 
-    def _generate_menu_tree(self, menu_item):
+        items = MenuItem.search([
+            (self.identifier_field.name, '=', path),
+            (parent_field, 'child_of', [root_id]),
+        ], limit=1)
+        if not items:
+            return set([root_id])
+
+        # The ancestors are read in a single query, which UNION stops on
+        # cycles. The query starts with SELECT for the sqlite driver not to
+        # commit before it.
+        cursor.execute(
+            'SELECT id FROM (WITH RECURSIVE branch (id, parent) AS ('
+            'SELECT id, "%(parent)s" FROM "%(table)s" WHERE id = %%s '
+            'UNION SELECT t.id, t."%(parent)s" FROM "%(table)s" AS t '
+            'JOIN branch ON t.id = branch.parent WHERE branch.id != %%s) '
+            'SELECT id FROM branch) AS branch' % {
+                'parent': parent_field, 'table': MenuItem._table,
+            }, (items[0].id, root_id)
+        )
+        return set(id for id, in cursor.fetchall())
+
+    def _read_items(self, root_id, fields_names, max_depth=None, branch=None):
         """
+        Returns the values of the menu items of the tree under the root
+        menu item keyed on their id, reading one level at a time unless the
+        whole tree is read through its nested set
+
+        :param branch: The ids of the only items whose children are read
+        """
+        MenuItem = Pool().get(self.model.model)
+        children_field = self.children_field.name
+        parent_field = MenuItem._fields[children_field].field
+
+        items = {}
+        level = [root_id]
+        if max_depth is None and branch is None and \
+                MenuItem._fields[parent_field].left:
+            descendants = MenuItem.search([
+                (parent_field, 'child_of', [root_id]),
+            ])
+            for values in MenuItem.read(map(int, descendants), fields_names):
+                items[values['id']] = values
+            if root_id in items:
+                level = []
+
+        depth = 0
+        while level:
+            next_level = []
+            for values in MenuItem.read(level, fields_names):
+                items[values['id']] = values
+                if max_depth is not None and depth >= max_depth:
+                    continue
+                if branch is not None and values['id'] not in branch:
+                    continue
+                next_level.extend(values[children_field])
+            level = [id for id in next_level if id not in items]
+            depth += 1
+        return items
+
+    def _generate_menu_tree(self, menu_item, max_depth=None, path=None):
+        """
+        Generates the menu tree under the given menu item. Each level of
+        the tree is fetched with a single read and the references of the
+        whole tree are resolved together.
+
         :param menu_item: Active record of the root menu_item
+        :param max_depth: The number of levels of items to generate under
+                the root menu item, or `None` for all of them
+        :param path: The value of the identifier field of a menu item,
+                in which case only the children of that item and of its
+                ancestors are generated
         """
-        result = {'children': []}
-        result.update(self._menu_item_to_dict(menu_item))
+        pool = Pool()
+        MenuItem = pool.get(self.model.model)
+        CMSLink = pool.get('nereid.cms.link')
+
+        title_field = self.title_field.name
+        uri_field = self.uri_field.name
+        children_field = self.children_field.name
+        fields_to_read = [title_field, uri_field, children_field]
+        if 'reference' in MenuItem._fields:
+            fields_to_read.append('reference')
+
+        branch = None
+        if path is not None:
+            branch = self._get_branch(menu_item.id, path)
+        items = self._read_items(
+            menu_item.id, fields_to_read, max_depth, branch
+        )
 
-        # If children exist iteratively call _generate_..
-        children = getattr(menu_item, self.children_field.name)
-        if children:
-            for child in children:
-                result['children'].append(
-                    self._generate_menu_tree(child))
-        return result
+        references = CMSLink.resolve_references(
+            values.get('reference') for values in items.itervalues()
+        )
+
+        def _to_dict(id):
+            values = items[id]
+            return {
+                'name': values[title_field],
+                'uri': references.get(
+                    values.get('reference'), values[uri_field]
+                ),
+                'children': [
+                    _to_dict(child) for child in values[children_field]
+                    if child in items
+                ],
+            }
+        return _to_dict(menu_item.id)
+
+    @staticmethod
+    def _dump_tree(tree):
+        """
+        Returns the compact serialized form of a menu tree, in which every
+        node is a `[name, uri, children]` list
+        """
+        def _to_list(node):
+            return [
+                node['name'], node['uri'],
+                [_to_list(child) for child in node['children']],
+            ]
+        return json.dumps(_to_list(tree), separators=(',', ':'))
+
+    @staticmethod
+    def _load_tree(data):
+        """
+        Returns the menu tree serialized by :meth:`_dump_tree`
+        """
+        def _to_dict(node):
+            name, uri, children = node
+            return {
+                'name': name,
+                'uri': uri,
+                'children': [_to_dict(child) for child in children],
+            }
+        return _to_dict(json.loads(data))
 
     @classmethod
-    def menu_for(cls, identifier, ident_field_value, objectified=False):
+    @instrument('nereid.cms.menu.menu_for')
+    def menu_for(cls, identifier, ident_field_value, objectified=False,
+                 max_depth=None, path=None):
         """
         Returns a dictionary of menu tree
 
@@ -167,7 +897,110 @@ class Menu(ModelSQL, ModelView):
                 looked up on model with search on ident_field
         :param objectified: The value returned is the active record of
                 the menu identified rather than a tree.
+        :param max_depth: The number of levels under the root item to
+                return, for example `1` for the root item and its
+                children. All the levels are returned by default.
+        :param path: The value of the identifier field of an item under
+                the root item. Only the children of that item and of its
+                ancestors are returned, as needed by breadcrumbs or the
+                sidebar of a section.
+
+        The items whose children were not asked for have an empty list of
+        children. Every combination of `max_depth` and `path` is cached
+        separately.
+
+        The trees are shared by the workers through the cache in their
+        serialized form, along with its digest. A worker keeps the trees
+        it decoded in memory and only fetches a tree from the cache again
+        when its digest changes, which happens when the tree is rebuilt.
+        The trees returned are shared and must not be modified.
         """
+        pool = Pool()
+        CacheVersion = pool.get('nereid.cms.cache.version')
+
+        # The menu and its root item are looked up from the cache before
+        # any query. The entry is keyed on the version of the menus and
+        # carries the version of the model of the menu it was built from.
+        lookup_key = key_from_list([
+            Transaction().cursor.dbname,
+            Transaction().user,
+            Transaction().language,
+            request.nereid_website.id,
+            identifier, ident_field_value,
+            CacheVersion.get_version(cls.__name__),
+            'nereid.cms.menu.menu_for.lookup',
+        ])
+        lookup = cache.get(lookup_key)
+        if lookup is not None and \
+                lookup[1] != CacheVersion.get_version(lookup[0]):
+            lookup = None
+        record_cache_lookup(lookup is not None)
+        if lookup is None:
+            lookup = cls._lookup_menu(identifier, ident_field_value)
+            if not isinstance(lookup, tuple):
+                # The menu or its root item could not be identified
+                return lookup
+            cache.set(lookup_key, lookup, cls.cache_timeout)
+        model, _, menu_id, root_id, tree_version_name = lookup
+
+        if objectified:
+            return pool.get(model)(root_id)
+
+        cache_key = key_from_list([
+            Transaction().cursor.dbname,
+            Transaction().user,
+            Transaction().language,
+            request.nereid_website.id,
+            identifier, ident_field_value, max_depth, path,
+            CacheVersion.get_version(cls.__name__),
+            CacheVersion.get_version(tree_version_name),
+            'nereid.cms.menu.menu_for',
+        ])
+        digest_key = cache_key + '-digest'
+        digest = cache.get(digest_key)
+        if digest is not None:
+            rv = cls._trees_cache.get(digest)
+            record_cache_lookup(rv is not None)
+            if rv is not None:
+                return rv
+
+            data = cache.get(cache_key)
+            record_cache_lookup(data is not None)
+            if data is not None and md5(data).hexdigest() == digest:
+                rv = cls._load_tree(data)
+                cls._trees_cache.set(digest, rv)
+                return rv
+        else:
+            record_cache_lookup(False)
+
+        data = cls._dump_tree(
+            cls(menu_id)._generate_menu_tree(
+                pool.get(model)(root_id), max_depth, path
+            )
+        )
+        digest = md5(data).hexdigest()
+        cache.set_many({
+            cache_key: data,
+            digest_key: digest,
+        }, cls.cache_timeout)
+        rv = cls._load_tree(data)
+        cls._trees_cache.set(digest, rv)
+        return rv
+
+    @classmethod
+    def _lookup_menu(cls, identifier, ident_field_value):
+        """
+        Returns a tuple of the model of the menu, the cache version of
+        the model, the ID of the menu, the ID of the root menu item and the
+        name of the cache version of its tree. An error response is
+        returned if either could not be identified.
+
+        :param identifier: The unique identifier of the menu
+        :param ident_field_value: The value of the identifier field of
+                the root menu item
+        """
+        CacheVersion = Pool().get('nereid.cms.cache.version')
+
         # First pick up the menu through identifier
         try:
             menu, = cls.search([
@@ -191,21 +1024,17 @@ class Menu(ModelSQL, ModelView):
                 "Menu %s could not be identified" % ident_field_value)
             return InternalServerError()
 
-        if objectified:
-            return root_menu_item
-
-        cache_key = key_from_list([
-            Transaction().cursor.dbname,
-            Transaction().user,
-            Transaction().language,
-            identifier, ident_field_value,
-            'nereid.cms.menu.menu_for',
-        ])
-        rv = cache.get(cache_key)
-        if rv is None:
-            rv = menu._generate_menu_tree(root_menu_item)
-            cache.set(cache_key, rv, 60 * 60)
-        return rv
+        # Trees of models which do not version them by tree are
+        # invalidated by any change to the model
+        tree_version_name = menu.model.model
+        if hasattr(MenuItem, 'get_tree_version_names'):
+            tree_version_name, = MenuItem.get_tree_version_names(
+                [root_menu_item]
+            )
+        return (
+            menu.model.model, CacheVersion.get_version(menu.model.model),
+            menu.id, root_menu_item.id, tree_version_name,
+        )
 
     def on_change_name(self):
         res = {}
@@ -222,10 +1051,10 @@ class Menu(ModelSQL, ModelView):
         This function is registered with nereid.template.context_processor
         in xml code
         """
-        return {'menu_for': cls.menu_for}
+        return {'menu_for': memoize_for_request(cls.menu_for)}
 
 
-class MenuItem(ModelSQL, ModelView):
+class MenuItem(CacheVersionMixin, ModelSQL, ModelView):
     "Nereid CMS Menuitem"
     __name__ = 'nereid.cms.menuitem'
     _rec_name = 'unique_name'
@@ -253,7 +1082,12 @@ class MenuItem(ModelSQL, ModelView):
         }
     )
     full_url = fields.Function(fields.Char('Full URL'), 'get_full_url')
-    parent = fields.Many2One('nereid.cms.menuitem', 'Parent Menuitem',)
+    parent = fields.Many2One(
+        'nereid.cms.menuitem', 'Parent Menuitem', select=True,
+        left='left', right='right'
+    )
+    left = fields.Integer('Left', required=True, select=True)
+    right = fields.Integer('Right', required=True, select=True)
     child = fields.One2Many(
         'nereid.cms.menuitem', 'parent', string='Child Menu Items'
     )
@@ -263,13 +1097,16 @@ class MenuItem(ModelSQL, ModelView):
     reference = fields.Reference('Reference', selection='links_get')
 
     def get_full_url(self, name):
-        #TODO
+        # TODO
         return ''
 
     @staticmethod
     def links_get():
-        CMSLink = Pool().get('nereid.cms.link')
-        return [(x.model, x.name) for x in CMSLink.search([])]
+        """
+        The links of menu items, with an empty choice for the items
+        which link to their uri
+        """
+        return Pool().get('nereid.cms.link').links_get()
 
     @staticmethod
     def default_active():
@@ -279,37 +1116,122 @@ class MenuItem(ModelSQL, ModelView):
     def default_values_to_build():
         return '{ }'
 
+    @staticmethod
+    def default_left():
+        return 0
+
+    @staticmethod
+    def default_right():
+        return 0
+
     @classmethod
     def __setup__(cls):
         super(MenuItem, cls).__setup__()
-        cls._constraints += [
-            ('check_recursion', 'wrong_recursion')
-        ]
         cls._error_messages.update({
             'wrong_recursion':
             'Error ! You can not create recursive menuitems.',
         })
         cls._order.insert(0, ('sequence', 'ASC'))
 
+    @classmethod
+    def validate(cls, menu_items):
+        super(MenuItem, cls).validate(menu_items)
+        try:
+            cls.check_recursion(menu_items, rec_name='title')
+        except UserError:
+            cls.raise_user_error('wrong_recursion')
+
     def on_change_title(self):
         res = {}
         if self.title and not self.unique_name:
             res['unique_name'] = slugify(self.title)
         return res
 
-    def get_rec_name(self, name):
-        def _name(menuitem):
-            if menuitem.parent:
-                return _name(menuitem.parent) + ' / ' + menuitem.title
-            else:
-                return menuitem.title
-        return _name(self)
+    @classmethod
+    def get_ancestor_ids(cls, menu_items):
+        """
+        Returns the ids of the given menu items and of all their ancestors,
+        which are found with a single query on the nested set
+        """
+        cursor = Transaction().cursor
+
+        ids = set(map(int, menu_items))
+        for i in range(0, len(menu_items), cursor.IN_MAX):
+            sub_ids = map(int, menu_items[i:i + cursor.IN_MAX])
+            cursor.execute(
+                'SELECT DISTINCT a.id FROM "%s" AS a, "%s" AS c '
+                'WHERE c.id IN (%s) AND c."left" > 0 '
+                'AND a."left" <= c."left" AND a."right" >= c."right"' % (
+                    cls._table, cls._table, ', '.join(['%s'] * len(sub_ids))
+                ), sub_ids
+            )
+            ids.update(id for id, in cursor.fetchall())
+        return ids
+
+    @classmethod
+    def read_ancestors(cls, menu_items, fields_names):
+        """
+        Returns the values of the given fields of the menu items and of
+        all their ancestors keyed on their id
+        """
+        items = {}
+        ids = cls.get_ancestor_ids(menu_items)
+        while ids:
+            for values in cls.read(list(ids), fields_names + ['parent']):
+                items[values['id']] = values
+            # The items left out of the nested set, like inactive ones,
+            # are read with their parents one level at a time
+            ids = set(
+                values['parent'] for values in items.itervalues()
+                if values['parent'] and values['parent'] not in items
+            )
+        return items
+
+    @classmethod
+    def get_tree_version_names(cls, menu_items):
+        """
+        Returns the names of the cache versions of the trees of the given
+        menu items, which are named after their top level item
+        """
+        return [
+            '%s,%d' % (cls.__name__, id)
+            for id, values in cls.read_ancestors(menu_items, []).iteritems()
+            if not values['parent']
+        ]
+
+    @classmethod
+    def get_cache_version_names(cls, menu_items):
+        """
+        Adds the trees of the menu items, so that changes only invalidate
+        the menus built on their trees
+        """
+        return super(MenuItem, cls).get_cache_version_names(menu_items) + \
+            cls.get_tree_version_names(menu_items)
+
+    @classmethod
+    def get_rec_name(cls, menu_items, name):
+        """
+        Returns the titles of the menu items prefixed by the titles of
+        their ancestors. The ancestors are all read together.
+        """
+        items = cls.read_ancestors(menu_items, ['title'])
+
+        def _name(id):
+            values = items[id]
+            if values['parent']:
+                return _name(values['parent']) + ' / ' + values['title']
+            return values['title']
+        return dict((item.id, _name(item.id)) for item in menu_items)
 
 
-class BannerCategory(ModelSQL, ModelView):
+class BannerCategory(CompositeIndexMixin, ModelSQL, ModelView):
     """Collection of related Banners"""
     __name__ = 'nereid.cms.banner.category'
 
+    _composite_indexes = [
+        (('name', 'website'), None),
+    ]
+
     name = fields.Char('Name', required=True, select=True)
     banners = fields.One2Many('nereid.cms.banner', 'category', 'Banners')
     website = fields.Many2One('nereid.website', 'WebSite', select=True)
@@ -320,6 +1242,7 @@ class BannerCategory(ModelSQL, ModelView):
     )
 
     @classmethod
+    @instrument('nereid.cms.banner.category.get_banner_category')
     def get_banner_category(cls, uri, silent=True):
         """Returns the browse record of the article category given by uri
         """
@@ -340,27 +1263,66 @@ class BannerCategory(ModelSQL, ModelView):
         This function is registered with nereid.template.context_processor
         in xml code
         """
-        return {'get_banner_category': cls.get_banner_category}
+        return {
+            'get_banner_category': memoize_for_request(
+                cls.get_banner_category
+            ),
+        }
 
-    def get_published_banners(self, name):
+    @classmethod
+    def get_published_banners(cls, categories, name):
         """
-        Get the published banners.
+        Get the published banners of all the given categories with a
+        single search.
         """
         NereidBanner = Pool().get('nereid.cms.banner')
-        res = []
+        res = dict((category.id, []) for category in categories)
         banners = NereidBanner.search([
             ('state', '=', 'published'),
-            ('category', '=', self.id)
+            ('category', 'in', [category.id for category in categories]),
         ])
-        for banner in NereidBanner.browse(banners):
-            res.append(banner.id)
+        for banner in banners:
+            res[banner.category.id].append(banner.id)
         return res
 
+    def get_published_banners_html(self):
+        """
+        Returns the HTML content of the published banners of the category
+        in the order of their sequence. The banners which are not cached
+        are rendered with a single read of the banners and a single lookup
+        of their static files.
+        """
+        Banner = Pool().get('nereid.cms.banner')
+        return Banner.get_html_many(self.published_banners)
+
 
-class Banner(ModelSQL, ModelView):
+class Banner(
+        CompositeIndexMixin, CacheVersionMixin, ModelSQL, ModelView):
     """Banner for CMS."""
     __name__ = 'nereid.cms.banner'
 
+    #: The time in seconds for which the rendered HTML of a banner is
+    #: cached. Changes to banners and static files invalidate it.
+    cache_timeout = 24 * 60 * 60
+
+    image_template = Template(
+        u'<a href="$click_url">'
+        u'<img src="$file" alt="$alternative_text"'
+        u' width="$width" height="$height"/>'
+        u'</a>'
+    )
+    remote_image_template = Template(
+        u'<a href="$click_url">'
+        u'<img src="$remote_image_url" alt="$alternative_text"'
+        u' width="$width" height="$height"/>'
+        u'</a>'
+    )
+
+    _composite_indexes = [
+        (('category', 'state'), None),
+        (('category', 'sequence'), "state = 'published'"),
+    ]
+
     name = fields.Char('Name', required=True, select=True)
     description = fields.Char('Description')
     category = fields.Many2One(
@@ -435,51 +1397,119 @@ class Banner(ModelSQL, ModelView):
 
     def get_html(self):
         """Return the HTML content"""
+        return self.get_html_many([self])[0]
+
+    @classmethod
+    @instrument('nereid.cms.banner.get_html_many')
+    def get_html_many(cls, banners):
+        """
+        Returns the HTML content of each of the given banners, in the same
+        order. The HTML is cached per banner, language and website, and
+        the banners missing from the cache are rendered together.
+
+        :param banners: List of banner active records
+        """
+        CacheVersion = Pool().get('nereid.cms.cache.version')
+
+        if not has_request_context():
+            # The URLs of the static files can only be built, and the
+            # cache only be reached, within a request
+            rendered = cls._render_html([banner.id for banner in banners])
+            return [rendered.get(banner.id) for banner in banners]
+
+        key_prefix = [
+            Transaction().cursor.dbname,
+            Transaction().language,
+            request.nereid_website.id,
+            CacheVersion.get_version(cls.__name__),
+            CacheVersion.get_version('nereid.static.file'),
+            CacheVersion.get_version('nereid.static.folder'),
+            'nereid.cms.banner.get_html',
+        ]
+        cache_keys = [
+            key_from_list(key_prefix + [banner.id]) for banner in banners
+        ]
+        rv = dict(zip(
+            [banner.id for banner in banners], cache.get_many(*cache_keys)
+        ))
+
+        missing = [id for id, html in rv.iteritems() if html is None]
+        record_cache_lookup(True, len(rv) - len(missing))
+        record_cache_lookup(False, len(missing))
+        if missing:
+            rendered = cls._render_html(missing)
+            cache.set_many(dict(
+                (key_from_list(key_prefix + [id]), html)
+                for id, html in rendered.iteritems()
+            ), cls.cache_timeout)
+            rv.update(rendered)
+        return [rv[banner.id] for banner in banners]
+
+    @classmethod
+    def _render_html(cls, ids):
+        """
+        Renders the HTML content of the banners with a single read of the
+        banners and a single lookup of their static files. Returns a
+        dictionary of the HTML content by banner ID.
+
+        :param ids: List of banner IDs
+        """
         StaticFile = Pool().get('nereid.static.file')
 
-        banner = self.read(
-            [self], [
+        banners = cls.read(
+            ids, [
                 'type', 'click_url', 'file',
                 'remote_image_url', 'custom_code', 'height', 'width',
-                'alternative_text', 'click_url'
+                'alternative_text',
             ]
-        )[0]
-
-        if banner['type'] == 'image':
-            # replace the `file` in the dictionary with the complete url
-            # that is required to render the image based on static file
-            file = StaticFile(banner['file'])
-            banner['file'] = file.url
-            image = Template(
-                u'<a href="$click_url">'
-                u'<img src="$file" alt="$alternative_text"'
-                u' width="$width" height="$height"/>'
-                u'</a>'
-            )
-            return image.substitute(**banner)
-        elif banner['type'] == 'remote_image':
-            image = Template(
-                u'<a href="$click_url">'
-                u'<img src="$remote_image_url" alt="$alternative_text"'
-                u' width="$width" height="$height"/>'
-                u'</a>')
-            return image.substitute(**banner)
-        elif banner['type'] == 'custom_code':
-            return banner['custom_code']
+        )
+
+        # The complete url that is required to render the image based on
+        # static file, for all the image banners at once
+        files = StaticFile.browse(list(set(
+            banner['file'] for banner in banners
+            if banner['type'] == 'image' and banner['file']
+        )))
+        file_urls = dict((file.id, file.url) for file in files)
+
+        rv = {}
+        for banner in banners:
+            if banner['type'] == 'image':
+                banner['file'] = file_urls.get(banner['file'])
+                rv[banner['id']] = cls.image_template.substitute(**banner)
+            elif banner['type'] == 'remote_image':
+                rv[banner['id']] = cls.remote_image_template.substitute(
+                    **banner
+                )
+            elif banner['type'] == 'custom_code':
+                rv[banner['id']] = banner['custom_code']
+        return rv
 
     @staticmethod
     def links_get():
-        CMSLink = Pool().get('nereid.cms.link')
-        return [('', '')] + [(x.model, x.name) for x in CMSLink.search([])]
+        return Pool().get('nereid.cms.link').links_get()
 
 
-class ArticleCategory(ModelSQL, ModelView):
+class ArticleCategory(
+        URIRoutingMixin, ResponseCacheMixin, CacheVersionMixin, ModelSQL,
+        ModelView):
     "Article Categories"
     __name__ = 'nereid.cms.article.category'
     _rec_name = 'title'
 
+    _routes_cache = Cache(
+        'nereid.cms.article.category.routes', size_limit=10000,
+        context=False
+    )
+
     per_page = 10
 
+    response_cache_models = [
+        'nereid.cms.article.category', 'nereid.cms.article',
+        'nereid.cms.banner', 'nereid.cms.article.attribute',
+        'nereid.static.file', 'nereid.static.folder',
+    ]
+
     title = fields.Char(
         'Title', size=100, translate=True,
         required=True, on_change=['title', 'unique_name'], select=True
@@ -520,6 +1550,7 @@ class ArticleCategory(ModelSQL, ModelView):
         return res
 
     @classmethod
+    @instrument('nereid.cms.article.category.render')
     def render(cls, uri, page=1):
         """
         Renders the category
@@ -527,22 +1558,86 @@ class ArticleCategory(ModelSQL, ModelView):
         Article = Pool().get('nereid.cms.article')
 
         # Find in cache or load from DB
+        after = request.args.get('after', type=int)
+        cache_key = cls.get_response_cache_key(uri, page, after)
+        if cache_key is not None:
+            rv = get_cached_response(cache_key)
+            if rv is not None:
+                return rv
+
         try:
-            category, = cls.search([('unique_name', '=', uri)])
+            category, = cls.search_by_uri(uri)
         except ValueError:
             return NotFound()
 
-        articles = Pagination(
-            Article, [('category', '=', category.id)], page, cls.per_page
+        etag, last_modified = cls.get_validators([category])[category.id]
+        rv = get_not_modified_response(etag, last_modified)
+        if rv is not None:
+            return rv
+
+        articles = KeysetPagination(
+            Article, [('category', '=', category.id)], page, cls.per_page,
+            after=after
+        )
+        with measure('nereid.cms.article.category.render.template'):
+            rv = set_validators(
+                render_template(
+                    category.template, category=category, articles=articles
+                ), etag, last_modified
+            )
+        if cache_key is not None:
+            return cache_response(cache_key, rv, cls.response_cache_timeout)
+        return rv
+
+    @classmethod
+    def get_modification_stamps(cls, categories):
+        """
+        Adds the banner and the articles of the categories, with the images
+        and the parties of the authors of the articles
+        """
+        Article = Pool().get('nereid.cms.article')
+
+        stamps = super(ArticleCategory, cls).get_modification_stamps(
+            categories
         )
-        return render_template(
-            category.template, category=category, articles=articles)
+        for category in categories:
+            if category.banner:
+                stamps[category.id].append((
+                    category.banner.__name__, category.banner.id,
+                    category.banner.write_date or category.banner.create_date
+                ))
+        category_ids = [category.id for category in categories]
+        for path in [(), ('image',), ('author', 'party')]:
+            table_stamps = cls.get_table_stamps(
+                Article, 'category', category_ids, path
+            )
+            for category_id in category_ids:
+                stamps[category_id].append(table_stamps[category_id])
+        return stamps
+
+    @classmethod
+    def create(cls, vlist):
+        categories = super(ArticleCategory, cls).create(vlist)
+        cls.invalidate_routes()
+        return categories
+
+    @classmethod
+    def write(cls, categories, values):
+        super(ArticleCategory, cls).write(categories, values)
+        if 'unique_name' in values:
+            cls.invalidate_routes()
 
     @classmethod
+    def lookup_uri(cls, uri):
+        with Transaction().set_context(active_test=False):
+            return map(int, cls.search([('unique_name', '=', uri)]))
+
+    @classmethod
+    @instrument('nereid.cms.article.category.get_article_category')
     def get_article_category(cls, uri, silent=True):
         """Returns the browse record of the article category given by uri
         """
-        category = cls.search([('unique_name', '=', uri)], limit=1)
+        category = cls.search_by_uri(uri)[:1]
         if not category and not silent:
             raise RuntimeError("Article category %s not found" % uri)
         return category[0] if category else None
@@ -556,17 +1651,24 @@ class ArticleCategory(ModelSQL, ModelView):
         This function is registered with nereid.template.context_processor
         in xml code
         """
-        return {'get_article_category': cls.get_article_category}
+        return {
+            'get_article_category': memoize_for_request(
+                cls.get_article_category
+            ),
+        }
 
     @classmethod
+    @instrument('nereid.cms.article.category.sitemap_index')
     def sitemap_index(cls):
-        index = SitemapIndex(cls, [])
+        index = CMSSitemapIndex(cls, [])
         return index.render()
 
     @classmethod
+    @instrument('nereid.cms.article.category.sitemap')
     def sitemap(cls, page):
-        sitemap_section = SitemapSection(cls, [], page)
-        sitemap_section.changefreq = 'daily'
+        sitemap_section = CMSSitemapSection(
+            cls, [], page, uri_field='unique_name'
+        )
         return sitemap_section.render()
 
     def get_absolute_url(self, **kwargs):
@@ -576,14 +1678,34 @@ class ArticleCategory(ModelSQL, ModelView):
         )
 
 
-class Article(ModelSQL, ModelView):
+class Article(
+        URIRoutingMixin, CompositeIndexMixin, ResponseCacheMixin,
+        CacheVersionMixin, ModelSQL, ModelView):
     "CMS Articles"
     __name__ = 'nereid.cms.article'
     _rec_name = 'uri'
 
+    _routes_cache = Cache(
+        'nereid.cms.article.routes', size_limit=10000, context=False
+    )
+
+    response_cache_models = [
+        'nereid.cms.article', 'nereid.cms.article.category',
+        'nereid.cms.banner', 'nereid.cms.article.attribute',
+        'nereid.static.file', 'nereid.static.folder',
+    ]
+
+    _composite_indexes = [
+        (('category', 'sequence', 'id'), 'active'),
+    ]
+
     uri = fields.Char('URI', required=True, select=True, translate=True)
     title = fields.Char('Title', required=True, select=True, translate=True)
-    content = fields.Text('Content', required=True, translate=True)
+    # The content and the description are only read when they are used,
+    # not along with the other fields of the articles in listings
+    content = fields.Text(
+        'Content', required=True, translate=True, loading='lazy'
+    )
     template = fields.Char('Template', required=True)
     active = fields.Boolean('Active', select=True)
     category = fields.Many2One(
@@ -595,7 +1717,7 @@ class Article(ModelSQL, ModelView):
     published_on = fields.Date('Published On')
     sequence = fields.Integer('Sequence', required=True, select=True)
     reference = fields.Reference('Reference', selection='links_get')
-    description = fields.Text('Short Description')
+    description = fields.Text('Short Description', loading='lazy')
     attributes = fields.One2Many(
         'nereid.cms.article.attribute', 'article', 'Attributes'
     )
@@ -603,6 +1725,16 @@ class Article(ModelSQL, ModelView):
     # Article can have a banner
     banner = fields.Many2One('nereid.cms.banner', 'Banner')
 
+    # Summaries of the content for listings, which do not load the content
+    excerpt = fields.Function(fields.Text('Excerpt'), 'get_summary')
+    word_count = fields.Function(
+        fields.Integer('Word Count'), 'get_summary'
+    )
+    reading_time = fields.Function(
+        fields.Integer('Reading Time', help='In minutes'), 'get_summary'
+    )
+    first_image = fields.Function(fields.Char('First Image'), 'get_summary')
+
     @classmethod
     def __setup__(cls):
         super(Article, cls).__setup__()
@@ -610,8 +1742,7 @@ class Article(ModelSQL, ModelView):
 
     @staticmethod
     def links_get():
-        CMSLink = Pool().get('nereid.cms.link')
-        return [('', '')] + [(x.model, x.name) for x in CMSLink.search([])]
+        return Pool().get('nereid.cms.link').links_get()
 
     @staticmethod
     def default_active():
@@ -651,25 +1782,133 @@ class Article(ModelSQL, ModelView):
         return Date.today()
 
     @classmethod
+    def create(cls, vlist):
+        ArticleURI = Pool().get('nereid.cms.article.uri')
+        ArticleSummary = Pool().get('nereid.cms.article.summary')
+
+        # The translations of the new articles are not synced one by one
+        with Transaction().set_context(_nereid_cms_article_sync=False):
+            articles = super(Article, cls).create(vlist)
+        ArticleURI.sync(articles)
+        ArticleSummary.sync(articles)
+        cls.invalidate_routes()
+        return articles
+
+    @classmethod
+    def write(cls, articles, values):
+        ArticleURI = Pool().get('nereid.cms.article.uri')
+        ArticleSummary = Pool().get('nereid.cms.article.summary')
+
+        # The translations written along are not synced one by one
+        with Transaction().set_context(_nereid_cms_article_sync=False):
+            super(Article, cls).write(articles, values)
+        if 'uri' in values:
+            ArticleURI.sync(articles)
+            cls.invalidate_routes()
+        if 'content' in values:
+            ArticleSummary.sync(articles)
+
+    @classmethod
+    def get_summary(cls, articles, names):
+        """
+        Returns the summary fields of the articles in the language of the
+        context from `nereid.cms.article.summary`, with a single read. The
+        summary of the articles which have none yet is computed from their
+        content without being stored, as reads never write.
+        """
+        ArticleSummary = Pool().get('nereid.cms.article.summary')
+
+        summaries = ArticleSummary.get_summaries(articles)
+        for article in articles:
+            if article.id not in summaries:
+                summaries[article.id] = ArticleSummary.get_summary_fields(
+                    ArticleSummary.summarize(article.content)
+                )
+        res = {}
+        for name in names:
+            res[name] = dict(
+                (article.id, summaries[article.id][name])
+                for article in articles
+            )
+        return res
+
+    @classmethod
+    def lookup_uri(cls, uri):
+        """
+        Resolves the uri with the map of `nereid.cms.article.uri` rather
+        than by searching the translations. The translations are only
+        searched in the languages which are not mapped.
+        """
+        ArticleURI = Pool().get('nereid.cms.article.uri')
+
+        if Transaction().language in ArticleURI.get_languages():
+            return ArticleURI.resolve(uri)
+        return super(Article, cls).lookup_uri(uri)
+
+    @classmethod
+    @instrument('nereid.cms.article.render')
     def render(cls, uri):
         """
         Renders the template
         """
+        cache_key = cls.get_response_cache_key(uri)
+        if cache_key is not None:
+            rv = get_cached_response(cache_key)
+            if rv is not None:
+                return rv
+
         try:
-            article, = cls.search([('uri', '=', uri)])
+            article, = cls.search_by_uri(uri)
         except ValueError:
             return NotFound()
-        return render_template(article.template, article=article)
+
+        etag, last_modified = cls.get_validators([article])[article.id]
+        rv = get_not_modified_response(etag, last_modified)
+        if rv is not None:
+            return rv
+
+        with measure('nereid.cms.article.render.template'):
+            rv = set_validators(
+                render_template(article.template, article=article),
+                etag, last_modified
+            )
+        if cache_key is not None:
+            return cache_response(cache_key, rv, cls.response_cache_timeout)
+        return rv
+
+    @classmethod
+    def get_modification_stamps(cls, articles):
+        """
+        Adds the category, banner, image and attributes of the articles
+        """
+        ArticleAttribute = Pool().get('nereid.cms.article.attribute')
+
+        stamps = super(Article, cls).get_modification_stamps(articles)
+        attribute_stamps = cls.get_table_stamps(
+            ArticleAttribute, 'article', [article.id for article in articles]
+        )
+        for article in articles:
+            for record in (article.category, article.banner, article.image):
+                if record:
+                    stamps[article.id].append((
+                        record.__name__, record.id,
+                        record.write_date or record.create_date
+                    ))
+            stamps[article.id].append(attribute_stamps[article.id])
+        return stamps
 
     @classmethod
+    @instrument('nereid.cms.article.sitemap_index')
     def sitemap_index(cls):
-        index = SitemapIndex(cls, [])
+        index = CMSSitemapIndex(cls, [])
         return index.render()
 
     @classmethod
+    @instrument('nereid.cms.article.sitemap')
     def sitemap(cls, page):
-        sitemap_section = SitemapSection(cls, [], page)
-        sitemap_section.changefreq = 'daily'
+        sitemap_section = CMSSitemapSection(
+            cls, [], page, uri_field='uri'
+        )
         return sitemap_section.render()
 
     def get_absolute_url(self, **kwargs):
@@ -678,7 +1917,291 @@ class Article(ModelSQL, ModelView):
         )
 
 
-class ArticleAttribute(ModelSQL, ModelView):
+class ArticleMapMixin(object):
+    """
+    Keeps a row of values computed from the fields of every article in every
+    translatable language, updated by :meth:`sync` and :meth:`rebuild`.
+    """
+
+    #: The fields of the articles which the values are computed from
+    _article_fields = []
+
+    @classmethod
+    def __register__(cls, module_name):
+        created = not TableHandler.table_exist(
+            Transaction().cursor, cls._table
+        )
+        super(ArticleMapMixin, cls).__register__(module_name)
+        if created:
+            cls.rebuild()
+
+    @staticmethod
+    def get_languages():
+        """
+        Returns the codes of the languages in which the articles are mapped
+        """
+        Lang = Pool().get('ir.lang')
+        Config = Pool().get('ir.configuration')
+
+        languages = Lang.search([('translatable', '=', True)])
+        return set(
+            [Config.get_language()] + [lang.code for lang in languages]
+        )
+
+    @classmethod
+    def get_article_values(cls, article):
+        """
+        Returns the values of the row of the article from the values read
+        of its :attr:`_article_fields`
+        """
+        return dict((name, article[name]) for name in cls._article_fields)
+
+    @classmethod
+    def sync(cls, articles, languages=None):
+        """
+        Updates the rows of the given articles in the given languages, all
+        the translatable languages by default
+        """
+        Article = Pool().get('nereid.cms.article')
+
+        article_ids = [int(article) for article in articles]
+        if not article_ids:
+            return
+        if languages is None:
+            languages = cls.get_languages()
+
+        cursor = Transaction().cursor
+        with Transaction().set_user(0):
+            # The content of the articles can be large, so they are read
+            # and their rows created a chunk at a time
+            for i in range(0, len(article_ids), cursor.IN_MAX):
+                sub_ids = article_ids[i:i + cursor.IN_MAX]
+                cls.delete(cls.search([
+                    ('article', 'in', sub_ids),
+                    ('language', 'in', list(languages)),
+                ]))
+                with Transaction().set_context(active_test=False):
+                    # Articles which are being deleted have no rows anymore
+                    sub_ids = map(int, Article.search([
+                        ('id', 'in', sub_ids),
+                    ]))
+                for language in languages:
+                    with Transaction().set_context(
+                            language=language, active_test=False):
+                        articles = Article.read(sub_ids, cls._article_fields)
+                    vlist = []
+                    for article in articles:
+                        values = cls.get_article_values(article)
+                        values.update({
+                            'language': language,
+                            'article': article['id'],
+                        })
+                        vlist.append(values)
+                    cls.create(vlist)
+
+    @classmethod
+    def rebuild(cls, languages=None):
+        """
+        Computes the rows of all the articles from scratch, in the given
+        languages or in all of them
+        """
+        Article = Pool().get('nereid.cms.article')
+
+        domain = []
+        if languages is not None:
+            domain.append(('language', 'in', list(languages)))
+        with Transaction().set_user(0):
+            cls.delete(cls.search(domain))
+        with Transaction().set_context(active_test=False):
+            cls.sync(Article.search([]), languages)
+
+
+class ArticleURI(ArticleMapMixin, CompositeIndexMixin, ModelSQL):
+    """
+    Nereid CMS Article URI
+
+    The uri of every article in every translatable language, so that
+    articles are found by uri with a single indexed lookup instead of a
+    search through the translations. The map is kept in sync by the
+    changes to the articles and to the translations of their uri.
+    """
+    __name__ = 'nereid.cms.article.uri'
+
+    _article_fields = ['uri']
+
+    _composite_indexes = [
+        (('language', 'uri'), None),
+    ]
+
+    language = fields.Char('Language', required=True)
+    uri = fields.Char('URI', required=True)
+    article = fields.Many2One(
+        'nereid.cms.article', 'Article', required=True, select=True,
+        ondelete='CASCADE'
+    )
+
+    @classmethod
+    def __setup__(cls):
+        super(ArticleURI, cls).__setup__()
+        cls._sql_constraints += [
+            ('article_language', 'UNIQUE(article, language)',
+                'An article can have only one URI per language.'),
+        ]
+
+    @classmethod
+    def resolve(cls, uri):
+        """
+        Returns the ids of the articles whose uri in the language of the
+        context is `uri`
+        """
+        cursor = Transaction().cursor
+        cursor.execute(
+            'SELECT article FROM "%s" WHERE language = %%s AND uri = %%s'
+            % cls._table, (Transaction().language, uri)
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class ArticleSummary(ArticleMapMixin, ModelSQL):
+    """
+    Nereid CMS Article Summary
+
+    A plain text excerpt, the word count and the first image of the
+    content of every article in every translatable language. They are
+    computed when the content changes, so that listings show them without
+    loading the content. The summaries are kept in sync like the map of
+    the uris of the articles.
+    """
+    __name__ = 'nereid.cms.article.summary'
+
+    _article_fields = ['content']
+
+    #: The maximum number of characters of the excerpts
+    excerpt_length = 300
+
+    #: The reading speed the reading time is computed with
+    words_per_minute = 200
+
+    #: The HTML elements which do not separate the words around them
+    inline_tags = frozenset([
+        'a', 'abbr', 'b', 'cite', 'code', 'em', 'i', 'mark', 'q', 's',
+        'small', 'span', 'strong', 'sub', 'sup', 'u',
+    ])
+
+    language = fields.Char('Language', required=True)
+    article = fields.Many2One(
+        'nereid.cms.article', 'Article', required=True, select=True,
+        ondelete='CASCADE'
+    )
+    excerpt = fields.Text('Excerpt')
+    word_count = fields.Integer('Word Count')
+    first_image = fields.Char('First Image')
+
+    @classmethod
+    def __register__(cls, module_name):
+        super(ArticleSummary, cls).__register__(module_name)
+
+        # The UNIQUE constraint already indexes these columns
+        table = TableHandler(Transaction().cursor, cls, module_name)
+        table.index_action(['article', 'language'], 'remove')
+
+    @classmethod
+    def __setup__(cls):
+        super(ArticleSummary, cls).__setup__()
+        cls._sql_constraints += [
+            ('article_language', 'UNIQUE(article, language)',
+                'An article can have only one summary per language.'),
+        ]
+
+    @classmethod
+    def parse(cls, content):
+        """
+        Returns the words and the source of the first image of the HTML
+        `content`
+        """
+        if not content or not content.strip():
+            return [], None
+        try:
+            tree = lxml.html.fromstring(content)
+        except (etree.ParserError, etree.XMLSyntaxError):
+            return [], None
+        for element in tree.xpath('//script|//style'):
+            element.drop_tree()
+        # Only the inline elements continue the text around them
+        for element in tree.iter(etree.Element):
+            if element.tag not in cls.inline_tags:
+                element.tail = u' ' + (element.tail or u'')
+        images = tree.xpath('//img/@src')
+        return tree.text_content().split(), images[0] if images else None
+
+    @classmethod
+    def summarize(cls, content):
+        """
+        Returns the summary fields of the HTML `content`
+        """
+        words, first_image = cls.parse(content)
+        excerpt = u''
+        for word in words:
+            if len(excerpt) + len(word) + 1 > cls.excerpt_length:
+                excerpt += u'\u2026'
+                break
+            excerpt = (excerpt + u' ' + word) if excerpt else word
+        return {
+            'excerpt': excerpt,
+            'word_count': len(words),
+            'first_image': first_image,
+        }
+
+    @classmethod
+    def get_summaries(cls, articles):
+        """
+        Returns the summary fields of the given articles in the language of
+        the context keyed on the article id. The articles without a summary
+        in this language, which is not mapped yet, get the summary of the
+        default language, whose content they show too.
+        """
+        Config = Pool().get('ir.configuration')
+
+        language = Transaction().language
+        article_ids = [int(article) for article in articles]
+        rv = {}
+        with Transaction().set_user(0):
+            summaries = cls.search_read([
+                ('article', 'in', article_ids),
+                ('language', 'in', list(
+                    set([language, Config.get_language()])
+                )),
+            ], fields_names=[
+                'article', 'language', 'excerpt', 'word_count', 'first_image',
+            ])
+        # The summaries of the language of the context come last to
+        # replace the others
+        summaries.sort(key=lambda summary: summary['language'] == language)
+        for summary in summaries:
+            rv[summary['article']] = cls.get_summary_fields(summary)
+        return rv
+
+    @classmethod
+    def get_summary_fields(cls, summary):
+        """
+        Returns the summary fields of an article from its `summary`
+        """
+        word_count = summary['word_count'] or 0
+        return {
+            'excerpt': summary['excerpt'],
+            'word_count': word_count,
+            'reading_time': int(
+                math.ceil(float(word_count) / cls.words_per_minute)
+            ),
+            'first_image': summary['first_image'],
+        }
+
+    @classmethod
+    def get_article_values(cls, article):
+        return cls.summarize(article['content'])
+
+
+class ArticleAttribute(CacheVersionMixin, ModelSQL, ModelView):
     "Articles Attribute"
     __name__ = 'nereid.cms.article.attribute'
     _rec_name = 'value'
@@ -700,3 +2223,193 @@ class ArticleAttribute(ModelSQL, ModelView):
         'nereid.cms.article', 'Article', ondelete='CASCADE', required=True,
         select=True,
     )
+
+
+class StaticFolder(CacheVersionMixin):
+    "Static folders, whose names are a part of the URL of banner images"
+    __metaclass__ = PoolMeta
+    __name__ = 'nereid.static.folder'
+
+
+class StaticFile(CacheVersionMixin):
+    "Static files, whose URLs are a part of the HTML of image banners"
+    __metaclass__ = PoolMeta
+    __name__ = 'nereid.static.file'
+
+
+class Model:
+    "Models, which invalidate the selection of models of the CMS links"
+    __metaclass__ = PoolMeta
+    __name__ = 'ir.model'
+
+    @classmethod
+    def create(cls, vlist):
+        models = super(Model, cls).create(vlist)
+        Pool().get('nereid.cms.link').invalidate_selections(['models'])
+        return models
+
+    @classmethod
+    def write(cls, models, values):
+        result = super(Model, cls).write(models, values)
+        Pool().get('nereid.cms.link').invalidate_selections(['models'])
+        return result
+
+    @classmethod
+    def delete(cls, models):
+        result = super(Model, cls).delete(models)
+        Pool().get('nereid.cms.link').invalidate_selections(['models'])
+        return result
+
+
+class Language:
+    """
+    Languages, which map the uris and the summaries of all the articles in
+    the languages which become translatable
+    """
+    __metaclass__ = PoolMeta
+    __name__ = 'ir.lang'
+
+    @staticmethod
+    def _map_articles(languages):
+        pool = Pool()
+        ArticleURI = pool.get('nereid.cms.article.uri')
+        ArticleSummary = pool.get('nereid.cms.article.summary')
+        Article = pool.get('nereid.cms.article')
+
+        codes = [language.code for language in languages]
+        if codes:
+            ArticleURI.rebuild(codes)
+            ArticleSummary.rebuild(codes)
+            Article.invalidate_routes()
+
+    @classmethod
+    def create(cls, vlist):
+        languages = super(Language, cls).create(vlist)
+        cls._map_articles([lang for lang in languages if lang.translatable])
+        return languages
+
+    @classmethod
+    def write(cls, languages, values):
+        result = super(Language, cls).write(languages, values)
+        if values.get('translatable') or 'code' in values:
+            cls._map_articles([lang for lang in languages if lang.translatable])
+        return result
+
+
+class Translation:
+    """
+    Translations, which keep the map of the uris and the summaries of
+    articles in sync, invalidate the cached pages of the translated articles
+    and invalidate the selections of the CMS links when their names change
+    """
+    __metaclass__ = PoolMeta
+    __name__ = 'ir.translation'
+
+    @staticmethod
+    def _get_article_ids(translations, field_name='uri'):
+        """
+        Returns the ids of the articles translated by `translations` in the
+        field `field_name`, or in any field if it is `None`
+        """
+        if not Transaction().context.get('_nereid_cms_article_sync', True):
+            # Written by the articles, which sync themselves at once
+            return []
+        name = 'nereid.cms.article,%s' % (field_name or '')
+        return list(set([
+            translation.res_id for translation in translations
+            if translation.type == 'model' and translation.res_id > 0
+            if translation.name == name or (
+                field_name is None and translation.name.startswith(name)
+            )
+        ]))
+
+    @staticmethod
+    def _touch_articles(article_ids):
+        """
+        Moves the modification time of the articles forward and bumps their
+        cache version, so that the cached pages and the ETags of their
+        translated content change too
+        """
+        Article = Pool().get('nereid.cms.article')
+
+        if not article_ids:
+            return
+        with Transaction().set_user(0):
+            with Transaction().set_context(active_test=False):
+                # Articles which are being deleted have no row anymore
+                articles = Article.search([('id', 'in', article_ids)])
+            Article.write(articles, {})
+
+    @staticmethod
+    def _invalidate_link_selections(translations):
+        CMSLink = Pool().get('nereid.cms.link')
+
+        names = set(translation.name for translation in translations)
+        selections = []
+        if 'nereid.cms.link,name' in names:
+            selections.append('links')
+        if 'ir.model,name' in names:
+            selections.append('models')
+        if selections:
+            CMSLink.invalidate_selections(selections)
+
+    @staticmethod
+    def _sync_article_uris(article_ids):
+        pool = Pool()
+        ArticleURI = pool.get('nereid.cms.article.uri')
+        Article = pool.get('nereid.cms.article')
+
+        if article_ids:
+            ArticleURI.sync(article_ids)
+            Article.invalidate_routes()
+
+    @staticmethod
+    def _sync_article_summaries(article_ids):
+        ArticleSummary = Pool().get('nereid.cms.article.summary')
+
+        if article_ids:
+            ArticleSummary.sync(article_ids)
+
+    @classmethod
+    def create(cls, vlist):
+        translations = super(Translation, cls).create(vlist)
+        cls._sync_article_uris(cls._get_article_ids(translations))
+        cls._sync_article_summaries(
+            cls._get_article_ids(translations, 'content')
+        )
+        cls._touch_articles(cls._get_article_ids(translations, None))
+        cls._invalidate_link_selections(translations)
+        return translations
+
+    @classmethod
+    def write(cls, translations, values):
+        if not set(values) & set(['name', 'res_id', 'lang', 'value']):
+            return super(Translation, cls).write(translations, values)
+
+        article_ids = cls._get_article_ids(translations)
+        summary_ids = cls._get_article_ids(translations, 'content')
+        touched_ids = cls._get_article_ids(translations, None)
+        cls._invalidate_link_selections(translations)
+        result = super(Translation, cls).write(translations, values)
+        cls._sync_article_uris(
+            article_ids + cls._get_article_ids(translations)
+        )
+        cls._sync_article_summaries(
+            summary_ids + cls._get_article_ids(translations, 'content')
+        )
+        cls._touch_articles(
+            touched_ids + cls._get_article_ids(translations, None)
+        )
+        cls._invalidate_link_selections(translations)
+        return result
+
+    @classmethod
+    def delete(cls, translations):
+        article_ids = cls._get_article_ids(translations)
+        summary_ids = cls._get_article_ids(translations, 'content')
+        touched_ids = cls._get_article_ids(translations, None)
+        cls._invalidate_link_selections(translations)
+        super(Translation, cls).delete(translations)
+        cls._sync_article_uris(article_ids)
+        cls._sync_article_summaries(summary_ids)
+        cls._touch_articles(touched_ids)
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+'''
+
+    Nereid CMS static export
+
+    Renders the pages of the CMS to a directory tree which can be served
+    by a CDN or a web server without going through nereid::
+
+        python -m trytond.modules.nereid_cms.export \
+            myproject.application:app /var/www/cms --processes 4
+
+    :copyright: (c) 2010-2013 by Openlabs Technologies & Consulting (P) Ltd.
+    :license: GPLv3, see LICENSE for more details
+
+'''
+import os
+import sys
+import json
+import errno
+import shutil
+from optparse import OptionParser
+from multiprocessing import Pool as ProcessPool
+
+from nereid.helpers import url_for
+
+from trytond.transaction import Transaction
+from trytond.backend import Database
+from trytond.pool import Pool
+
+from .sitemap import CMSSitemapIndex
+
+__all__ = ['StaticExporter']
+
+#: The exporter used by the worker processes, which inherit it from the
+#: process which forks them
+_exporter = None
+
+
+def _init_worker(database_name):
+    """
+    Initialises a worker process with its own connection to the database
+    """
+    Database(database_name).connect()
+
+
+def _export_paths(paths):
+    return _exporter.export_paths(paths)
+
+
+class StaticExporter(object):
+    """
+    Renders the active articles and article categories of every mapped
+    language, and the sitemaps, to static files in `directory`. The pages
+    are requested from the application itself, so they are rendered by
+    the same views and templates as when visitors request them.
+
+    A page at `/en_US/article/about` is written to
+    `en_US/article/about/index.html`, while sitemaps keep their name.
+    Only the first page of the categories is exported, the next pages
+    being reached with a cursor in the query string.
+
+    :param app: The nereid application
+    :param directory: The directory to write the pages to
+    :param host: The host name of the website to export
+    """
+
+    #: The name of the file in `directory` which records the ETags of the
+    #: exported pages, for incremental exports
+    state_filename = '.nereid-cms-export.json'
+
+    def __init__(self, app, directory, host='localhost'):
+        self.app = app
+        self.directory = directory
+        self.host = host
+
+    @property
+    def state_file(self):
+        return os.path.join(self.directory, self.state_filename)
+
+    def load_state(self):
+        """
+        Returns the ETags of the pages exported to the directory keyed on
+        their path, `None` for the sitemaps and the pages which failed
+        """
+        try:
+            with open(self.state_file) as state_file:
+                return json.load(state_file)['etags']
+        except IOError:
+            return {}
+
+    def save_state(self, etags):
+        with open(self.state_file, 'w') as state_file:
+            json.dump({'etags': etags}, state_file)
+
+    def get_record_pages(self, records, uris):
+        """
+        Returns the ETags of the pages of `records` in the language of the
+        context keyed on their path, `uris` giving the uri of every record
+        """
+        if not records:
+            return {}
+        language = Transaction().language
+        validators = records[0].get_validators(records)
+        return dict(
+            (url_for(
+                '%s.render' % record.__name__, uri=uris[record.id],
+                language=language
+            ), validators[record.id][0])
+            for record in records
+        )
+
+    def get_sitemap_pages(self, model):
+        """
+        Returns the paths of the sitemaps of `model` in the language of the
+        context, with a `None` ETag as they are always rendered
+        """
+        language = Transaction().language
+        paths = [url_for(
+            '%s.sitemap_index' % model.__name__, language=language
+        )]
+        for page, _ in CMSSitemapIndex(model, []):
+            paths.append(url_for(
+                '%s.sitemap' % model.__name__, page=page, language=language
+            ))
+        return dict.fromkeys(paths)
+
+    def get_pages(self):
+        """
+        Returns the ETags of all the pages to export, keyed on their path
+        """
+        pool = Pool()
+        Article = pool.get('nereid.cms.article')
+        ArticleCategory = pool.get('nereid.cms.article.category')
+        ArticleURI = pool.get('nereid.cms.article.uri')
+
+        pages = {}
+        for language in ArticleURI.get_languages():
+            with Transaction().set_context(language=language):
+                # The uris of the articles are taken from their map
+                articles = Article.search([])
+                uris = dict(
+                    (uri['article'], uri['uri']) for uri in
+                    ArticleURI.search_read([
+                        ('article', 'in', map(int, articles)),
+                        ('language', '=', language),
+                    ], fields_names=['article', 'uri'])
+                )
+                pages.update(self.get_record_pages(articles, uris))
+                pages.update(self.get_sitemap_pages(Article))
+
+                categories = ArticleCategory.search([])
+                uris = dict(
+                    (category.id, category.unique_name)
+                    for category in categories
+                )
+                pages.update(self.get_record_pages(categories, uris))
+                pages.update(self.get_sitemap_pages(ArticleCategory))
+        return pages
+
+    def is_safe_path(self, path):
+        """
+        Tells whether the page at `path` can be written to the directory:
+        uris are edited freely, so that a uri like `..` could otherwise
+        write or remove the pages of other paths
+        """
+        names = path.strip('/').split('/')
+        if [name for name in names if name in ('', '.', '..')] or \
+                [name for name in names if os.sep in name]:
+            return False
+        directory = os.path.abspath(self.directory)
+        filename = os.path.abspath(self.get_filename(path))
+        return filename.startswith(directory + os.sep)
+
+    def get_filename(self, path):
+        """
+        Returns the name of the file the page at `path` is written to
+        """
+        filename = os.path.join(self.directory, *path.strip('/').split('/'))
+        if not path.endswith('.xml'):
+            filename = os.path.join(filename, 'index.html')
+        return filename
+
+    def export_paths(self, paths):
+        """
+        Requests the pages at the given paths and writes them to their
+        files. Returns the paths which could not be rendered.
+        """
+        failed = []
+        with self.app.test_client() as client:
+            for path in paths:
+                response = client.get(
+                    path, base_url='http://%s/' % self.host
+                )
+                if response.status_code != 200:
+                    failed.append(path)
+                    continue
+                filename = self.get_filename(path)
+                try:
+                    os.makedirs(os.path.dirname(filename))
+                except OSError as exc:
+                    if exc.errno != errno.EEXIST:
+                        raise
+                with open(filename, 'wb') as page_file:
+                    page_file.write(response.data)
+        return failed
+
+    def remove_paths(self, paths):
+        """
+        Removes the files of the pages at the given paths
+        """
+        for path in filter(self.is_safe_path, paths):
+            filename = self.get_filename(path)
+            if path.endswith('.xml'):
+                if os.path.exists(filename):
+                    os.remove(filename)
+            else:
+                shutil.rmtree(os.path.dirname(filename), ignore_errors=True)
+
+    def render_paths(self, paths, processes=1):
+        """
+        Renders the pages at the given paths, split between `processes`
+        worker processes, and returns the paths which could not be rendered
+        """
+        global _exporter
+
+        if processes <= 1:
+            return self.export_paths(paths)
+
+        # The workers open their own connections instead of sharing the
+        # ones of this process
+        Database(self.app.database_name).close()
+        _exporter = self
+        workers = ProcessPool(
+            processes, _init_worker, (self.app.database_name,)
+        )
+        try:
+            return sum(workers.map(
+                _export_paths,
+                [paths[index::processes] for index in xrange(processes)]
+            ), [])
+        finally:
+            workers.close()
+            workers.join()
+
+    def export(self, incremental=False, processes=1):
+        """
+        Exports the pages and returns the paths which could not be
+        rendered. An incremental export only renders the pages whose ETag
+        changed since the previous export to the directory. The files of
+        the pages which no longer exist are removed. Pages whose path would
+        leave their own directory are not exported.
+        """
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        etags = self.load_state()
+        with self.app.root_transaction:
+            with self.app.test_request_context(
+                    '/', base_url='http://%s/' % self.host):
+                pages = self.get_pages()
+        unsafe = [path for path in pages if not self.is_safe_path(path)]
+        for path in unsafe:
+            del pages[path]
+
+        self.remove_paths([path for path in etags if path not in pages])
+        to_render = [
+            path for path, etag in pages.iteritems()
+            if not incremental or etag is None or etags.get(path) != etag
+        ]
+        failed = self.render_paths(to_render, processes)
+
+        # Pages which failed are rendered again by the next export
+        for path in failed:
+            pages[path] = None
+        self.save_state(pages)
+        return unsafe + failed
+
+
+def main():
+    parser = OptionParser(
+        usage='%prog [options] module:application directory'
+    )
+    parser.add_option(
+        '--host', default='localhost',
+        help='The host name of the website to export'
+    )
+    parser.add_option(
+        '--processes', type='int', default=1,
+        help='The number of worker processes rendering the pages'
+    )
+    parser.add_option(
+        '--incremental', action='store_true', default=False,
+        help='Only render the pages changed since the previous export'
+    )
+    options, args = parser.parse_args()
+    if len(args) != 2:
+        parser.error('An application and a directory are required')
+
+    module_name, app_name = args[0].split(':')
+    __import__(module_name)
+    app = getattr(sys.modules[module_name], app_name)
+
+    exporter = StaticExporter(app, args[1], options.host)
+    failed = exporter.export(options.incremental, options.processes)
+    for path in failed:
+        sys.stderr.write('Could not render %s\n' % path)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
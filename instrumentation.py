@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+'''
+
+    Nereid CMS instrumentation
+
+    Records the number of SQL queries, the time spent and the cache hits
+    and misses of the CMS entry points and template helpers. The figures
+    are reported for every request, in the debug log and optionally in
+    the `X-Nereid-CMS-Stats` response header, and are summed up in
+    counters kept by the process since it started.
+
+    The queries are only counted once :func:`install_instrumentation` has
+    been called, for example where the application is created::
+
+        install_instrumentation(app)
+
+    :copyright: (c) 2010-2013 by Openlabs Technologies & Consulting (P) Ltd.
+    :license: GPLv3, see LICENSE for more details
+
+'''
+import hmac
+import time
+from threading import local, Lock
+from functools import wraps
+from contextlib import contextmanager
+
+from nereid import current_app, request
+from flask import has_request_context, after_this_request
+from werkzeug.wrappers import Response
+
+from trytond.backend import Cursor
+
+__all__ = [
+    'Stats', 'query_count', 'cache_counts', 'record_cache_lookup',
+    'measure', 'instrument', 'get_request_stats', 'get_counters',
+    'reset_counters', 'render_counters', 'MetricsMiddleware',
+    'install_instrumentation',
+]
+
+#: The queries and cache lookups made by the current thread
+_local = local()
+
+#: The cumulative :class:`Stats` of the process by entry point
+_counters = {}
+_counters_lock = Lock()
+
+
+class Stats(object):
+    """
+    The calls of an entry point along with the queries, the time in
+    seconds and the cache hits and misses they took
+    """
+    __slots__ = ('calls', 'queries', 'time', 'hits', 'misses')
+
+    def __init__(self):
+        self.calls = 0
+        self.queries = 0
+        self.time = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, queries, duration, hits, misses):
+        self.calls += 1
+        self.queries += queries
+        self.time += duration
+        self.hits += hits
+        self.misses += misses
+
+    def as_dict(self):
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+
+def _counting_execute(execute):
+    @wraps(execute)
+    def wrapper(self, sql, params=None):
+        _local.queries = getattr(_local, 'queries', 0) + 1
+        return execute(self, sql, params)
+    wrapper.counts_queries = True
+    return wrapper
+
+
+def install_instrumentation(app):
+    """
+    Counts the queries of the process and, if the application is configured
+    with a `NEREID_CMS_METRICS_TOKEN`, serves the counters to the scrapers
+    which send it with :class:`MetricsMiddleware`
+    """
+    if not getattr(Cursor.execute, 'counts_queries', False):
+        Cursor.execute = _counting_execute(Cursor.execute)
+    token = app.config.get('NEREID_CMS_METRICS_TOKEN')
+    if token:
+        app.wsgi_app = MetricsMiddleware(app.wsgi_app, token)
+
+
+def query_count():
+    """
+    Returns the number of queries executed by the current thread
+    """
+    return getattr(_local, 'queries', 0)
+
+
+def cache_counts():
+    """
+    Returns the number of cache hits and misses of the current thread
+    """
+    return getattr(_local, 'hits', 0), getattr(_local, 'misses', 0)
+
+
+def record_cache_lookup(hit, count=1):
+    """
+    Records that `count` values were looked up in a cache and found
+    (`hit`) or not
+    """
+    if hit:
+        _local.hits = getattr(_local, 'hits', 0) + count
+    else:
+        _local.misses = getattr(_local, 'misses', 0) + count
+
+
+def get_request_stats():
+    """
+    Returns the :class:`Stats` of the current request by entry point,
+    creating them on first use. Outside of a request `None` is returned.
+    """
+    if not has_request_context():
+        return None
+    stats = getattr(request, 'nereid_cms_stats', None)
+    if stats is None:
+        stats = request.nereid_cms_stats = {}
+        after_this_request(_report_request_stats)
+    return stats
+
+
+def _report_request_stats(response):
+    """
+    Logs the stats of the request and sends them in a header if the
+    application is configured with `NEREID_CMS_STATS_HEADER`
+    """
+    stats = ', '.join(
+        '%s;calls=%d;queries=%d;dur=%.2f;hits=%d;misses=%d' % (
+            name, entry.calls, entry.queries, entry.time * 1000,
+            entry.hits, entry.misses
+        ) for name, entry in sorted(request.nereid_cms_stats.iteritems())
+    )
+    current_app.logger.debug("CMS stats: %s" % stats)
+    if current_app.config.get('NEREID_CMS_STATS_HEADER'):
+        response.headers['X-Nereid-CMS-Stats'] = stats
+    return response
+
+
+@contextmanager
+def measure(name):
+    """
+    Records the queries, time and cache lookups of the block under the
+    entry point `name`. The figures of nested blocks are also included in
+    those of the enclosing ones.
+    """
+    queries = query_count()
+    hits, misses = cache_counts()
+    start = time.time()
+    try:
+        yield
+    finally:
+        duration = time.time() - start
+        queries = query_count() - queries
+        hits, misses = [
+            after - before for before, after in zip(
+                (hits, misses), cache_counts()
+            )
+        ]
+
+        stats = get_request_stats()
+        if stats is not None:
+            stats.setdefault(name, Stats()).add(
+                queries, duration, hits, misses
+            )
+        with _counters_lock:
+            _counters.setdefault(name, Stats()).add(
+                queries, duration, hits, misses
+            )
+
+
+def instrument(name):
+    """
+    Records the calls of the decorated function under the entry point
+    `name` with :func:`measure`. Methods are decorated beneath
+    `classmethod`::
+
+        @classmethod
+        @instrument('nereid.cms.menu.menu_for')
+        def menu_for(cls, identifier, ident_field_value):
+            ...
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with measure(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_counters():
+    """
+    Returns the cumulative stats of the process by entry point, as
+    dictionaries
+    """
+    with _counters_lock:
+        return dict(
+            (name, stats.as_dict()) for name, stats in _counters.iteritems()
+        )
+
+
+def reset_counters():
+    with _counters_lock:
+        _counters.clear()
+
+
+def render_counters():
+    """
+    Returns the cumulative stats in the text format of Prometheus
+    """
+    metrics = (
+        ('calls', 'calls_total', 'Calls of the entry point'),
+        ('queries', 'queries_total', 'SQL queries of the calls'),
+        ('time', 'seconds_total', 'Time spent in the calls'),
+        ('hits', 'cache_hits_total', 'Cache hits of the calls'),
+        ('misses', 'cache_misses_total', 'Cache misses of the calls'),
+    )
+    counters = sorted(get_counters().iteritems())
+    lines = []
+    for field, metric, description in metrics:
+        lines.append('# HELP nereid_cms_%s %s' % (metric, description))
+        lines.append('# TYPE nereid_cms_%s counter' % metric)
+        for name, stats in counters:
+            lines.append('nereid_cms_%s{entry_point="%s"} %s' % (
+                metric, name, stats[field]
+            ))
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware(object):
+    """
+    A WSGI middleware which answers the requests to `path` with the
+    cumulative counters of the process, for the metrics collectors which
+    send `token` in an `Authorization: Bearer` header::
+
+        app.wsgi_app = MetricsMiddleware(app.wsgi_app, token)
+
+    The counters are kept per process, so every worker process of the
+    application has to be scraped.
+    """
+
+    def __init__(self, app, token, path='/_nereid_cms/metrics'):
+        self.app = app
+        self.token = token
+        self.path = path
+
+    def is_authorized(self, environ):
+        return hmac.compare_digest(
+            environ.get('HTTP_AUTHORIZATION', ''), 'Bearer %s' % str(self.token)
+        )
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO') != self.path:
+            return self.app(environ, start_response)
+        if not self.is_authorized(environ):
+            return self.app(environ, start_response)
+        response = Response(
+            render_counters(), mimetype='text/plain; version=0.0.4'
+        )
+        return response(environ, start_response)
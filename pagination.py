@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+'''
+
+    Nereid CMS pagination
+
+    :copyright: (c) 2010-2013 by Openlabs Technologies & Consulting (P) Ltd.
+    :license: GPLv3, see LICENSE for more details
+
+'''
+from nereid import cache
+from nereid.helpers import key_from_list
+from nereid.contrib.pagination import Pagination
+from werkzeug.utils import cached_property
+
+from trytond.transaction import Transaction
+from trytond.pool import Pool
+
+from .instrumentation import instrument, record_cache_lookup
+
+__all__ = ['KeysetPagination']
+
+
+class KeysetPagination(Pagination):
+    """
+    A :class:`Pagination` which seeks to the items after the cursor
+    instead of skipping the previous pages with an OFFSET
+
+    :param after: The id of the last item of the previous page
+    """
+
+    #: The time in seconds for which the counts are cached, or `None` to
+    #: count on every request
+    count_cache_timeout = 60 * 60
+
+    def __init__(self, obj, domain, page, per_page, order=None, after=None):
+        if order is None:
+            order = obj._order
+        order = list(order)
+        if 'id' not in [field for field, _ in order]:
+            order.append(('id', 'ASC'))
+        self.after = after
+        super(KeysetPagination, self).__init__(
+            obj, domain, page, per_page, order
+        )
+
+    @cached_property
+    def keyset_domain(self):
+        """
+        Returns the domain of the items after the cursor, or `None`. Besides
+        the condition on all the fields of the order, the first field is
+        bounded on its own, so that the database can seek its index to the
+        cursor instead of filtering the items of the previous pages.
+        """
+        if not self.after:
+            return None
+        fields = [field for field, _ in self.order]
+        with Transaction().set_context(active_test=False):
+            records = self.obj.search_read(
+                [('id', '=', self.after)] + self.domain,
+                fields_names=fields
+            )
+        if not records:
+            return None
+        values = records[0]
+
+        domain = ['OR']
+        for index, (field, direction) in enumerate(self.order):
+            clause = [(f, '=', values[f]) for f, _ in self.order[:index]]
+            clause.append(
+                (field, '>' if direction.upper() == 'ASC' else '<',
+                    values[field])
+            )
+            domain.append(clause)
+
+        field, direction = self.order[0]
+        if len(self.order) > 1 and values[field] is not None:
+            domain = [
+                (field, '>=' if direction.upper() == 'ASC' else '<=',
+                    values[field]),
+                domain,
+            ]
+        return domain
+
+    @cached_property
+    @instrument('nereid.cms.pagination.count')
+    def count(self):
+        """
+        Returns the count of entries, from the cache if possible
+        """
+        if self._count is not None or self.count_cache_timeout is None:
+            return super(KeysetPagination, self).count
+
+        CacheVersion = Pool().get('nereid.cms.cache.version')
+        cache_key = key_from_list([
+            Transaction().cursor.dbname,
+            Transaction().user,
+            self.obj.__name__,
+            self.domain,
+            CacheVersion.get_version(self.obj.__name__),
+            'nereid.cms.pagination.count',
+        ])
+        count = cache.get(cache_key)
+        record_cache_lookup(count is not None)
+        if count is None:
+            count = super(KeysetPagination, self).count
+            cache.set(cache_key, count, self.count_cache_timeout)
+        return count
+
+    @cached_property
+    @instrument('nereid.cms.pagination.items')
+    def page_items(self):
+        """
+        The items of the page and whether there is an item after them
+        """
+        if self.keyset_domain is None:
+            records = self.obj.search(
+                self.domain, offset=self.offset, limit=self.per_page + 1,
+                order=self.order
+            )
+        else:
+            records = self.obj.search(
+                self.domain + [self.keyset_domain],
+                limit=self.per_page + 1, order=self.order
+            )
+        return records[:self.per_page], len(records) > self.per_page
+
+    def items(self):
+        """
+        Returns the list of browse records of items in the page
+        """
+        return self.page_items[0]
+
+    @property
+    def has_next(self):
+        return self.page_items[1]
+
+    @property
+    def next_cursor(self):
+        """
+        The cursor of the next page, or `None` if this is the last page
+        """
+        items = self.items()
+        if not items or not self.has_next:
+            return None
+        return items[-1].id
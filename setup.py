@@ -1,6 +1,6 @@
 #!/usr/bin/env python
-#This file is part of Tryton.  The COPYRIGHT file at the top level of
-#this repository contains the full copyright notices and license terms.
+# This file is part of Tryton.  The COPYRIGHT file at the top level of
+# this repository contains the full copyright notices and license terms.
 
 from setuptools import setup, Command
 import re
@@ -39,6 +39,48 @@ class XMLTests(Command):
         cov.xml_report(outfile="coverage.xml")
 
 
+class RunBenchmark(Command):
+    """Runs the benchmark of the CMS hot paths, see benchmarks/benchmark.py
+
+    The database is created and loaded with synthetic data on the first
+    run, which takes a while for the default sizes::
+
+        python setup.py benchmark --config=/etc/trytond.conf
+
+    """
+    description = "Benchmark the CMS hot paths"
+
+    user_options = [
+        ('config=', None, 'The trytond configuration file'),
+        ('database=', None, 'The database to load and benchmark'),
+        ('articles=', None, 'The number of articles to load'),
+        ('languages=', None, 'The number of languages of the articles'),
+        ('iterations=', None, 'The number of calls measured per endpoint'),
+    ]
+
+    def initialize_options(self):
+        self.config = None
+        self.database = None
+        self.articles = None
+        self.languages = None
+        self.iterations = None
+
+    def finalize_options(self):
+        pass
+
+    def run(self):
+        import sys
+        sys.path.insert(0, 'benchmarks')
+        from benchmark import main
+
+        args = []
+        for option, _, _ in self.user_options:
+            value = getattr(self, option[:-1])
+            if value is not None:
+                args.append('--%s%s' % (option, value))
+        main(args)
+
+
 class RunAudit(Command):
     """Audits source code using PyFlakes for following issues:
         - Names which are used but not defined or used before they are defined.
@@ -83,6 +125,7 @@ class RunAudit(Command):
 def read(fname):
     return open(os.path.join(os.path.dirname(__file__), fname)).read()
 
+
 config = ConfigParser.ConfigParser()
 config.readfp(open('tryton.cfg'))
 info = dict(config.items('tryton'))
@@ -154,5 +197,6 @@ setup(
     cmdclass={
         'xmltests': XMLTests,
         'audit': RunAudit,
+        'benchmark': RunBenchmark,
     },
 )
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+'''
+
+    Nereid CMS sitemaps
+
+    :copyright: (c) 2010-2013 by Openlabs Technologies & Consulting (P) Ltd.
+    :license: GPLv3, see LICENSE for more details
+
+'''
+import pytz
+from lxml import etree
+from lxml.builder import E
+
+from nereid import current_app, request
+from nereid.helpers import url_for, key_from_list
+from nereid.contrib.sitemap import SitemapIndex, SitemapSection
+
+from trytond.transaction import Transaction
+from trytond.pool import Pool
+
+from .caching import get_cached_response, cache_response, parse_timestamp
+
+__all__ = ['CMSSitemapIndex', 'CMSSitemapSection']
+
+
+def get_sitemap_cache_key(model, *args):
+    """
+    Returns the key under which a sitemap of `model` is cached. The key
+    changes whenever a record of the model is changed.
+    """
+    CacheVersion = Pool().get('nereid.cms.cache.version')
+    return key_from_list([
+        Transaction().cursor.dbname,
+        Transaction().language,
+        request.host,
+        model.__name__,
+        args,
+        CacheVersion.get_version(model.__name__),
+        'nereid.cms.sitemap',
+    ])
+
+
+def render_sitemap(cache_key, lines, cache_timeout):
+    """
+    Returns the response for the XML sitemap made of the strings produced
+    by the generator `lines`, which is only consumed if the sitemap is not
+    already in the cache under `cache_key`.
+    """
+    rv = get_cached_response(cache_key)
+    if rv is None:
+        rv = cache_response(
+            cache_key,
+            current_app.response_class(
+                ''.join(lines), mimetype='application/xml'
+            ),
+            cache_timeout
+        )
+    rv.cache_control.public = True
+    rv.cache_control.max_age = cache_timeout
+    return rv
+
+
+def w3c_datetime(timestamp):
+    """
+    Returns the timestamp stored by Tryton in the W3C Datetime format
+    """
+    return pytz.utc.localize(timestamp).isoformat()
+
+
+class CMSSitemapIndex(SitemapIndex):
+    """
+    A sitemap index which only lists the sitemap pages that contain
+    records matching the domain, along with the time of the latest change
+    to their records. It is computed with a single grouped query and
+    cached until a record of the model changes.
+    """
+
+    def __iter__(self):
+        """
+        Yields a (page, lastmod) tuple for every page of the sitemap which
+        is not empty
+        """
+        cursor = Transaction().cursor
+        query, args = self.model.search(
+            self.domain, order=[], query_string=True
+        )
+        cursor.execute(
+            'SELECT (id - 1) / %%s, MAX(COALESCE(write_date, create_date)) '
+            'FROM "%s" WHERE id IN (%s) GROUP BY 1 ORDER BY 1' % (
+                self.model._table, query
+            ), [self.batch_size] + args
+        )
+        for page, timestamp in cursor.fetchall():
+            yield page + 1, parse_timestamp(timestamp)
+
+    def lines(self):
+        method = '%s.sitemap' % self.model.__name__
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<sitemapindex ' \
+            'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        for page, timestamp in self:
+            yield etree.tostring(E(
+                'sitemap',
+                E('loc', url_for(method, page=page, _external=True)),
+                E('lastmod', w3c_datetime(timestamp)),
+            )) + '\n'
+        yield '</sitemapindex>'
+
+    def render(self):
+        return render_sitemap(
+            get_sitemap_cache_key(self.model, self.domain, 'index'),
+            self.lines(), self.cache_timeout
+        )
+
+
+class CMSSitemapSection(SitemapSection):
+    """
+    A sitemap page which reads only the columns it needs, in chunks
+    ordered on the id instead of browsing every record, and which is
+    cached until a record of the model changes.
+
+    The pages are ranges of ids, so a page is found by seeking on the
+    primary key, however deep it is. The URLs point to the render method
+    of the model with the value of :attr:`uri_field` as the uri.
+    """
+
+    changefreq = 'daily'
+
+    #: The number of records read per query
+    chunk_size = 250
+
+    def __init__(self, model, domain, page, uri_field='uri'):
+        super(CMSSitemapSection, self).__init__(model, domain, page)
+        self.uri_field = uri_field
+
+    def __iter__(self):
+        last_id = self.min_id
+        while True:
+            rows = self.model.search_read(
+                [
+                    ('id', '>', last_id), ('id', '<=', self.max_id)
+                ] + self.domain,
+                order=[('id', 'ASC')], limit=self.chunk_size,
+                fields_names=[self.uri_field, 'write_date', 'create_date'],
+            )
+            for row in rows:
+                yield self.get_url_xml(row)
+            if len(rows) < self.chunk_size:
+                break
+            last_id = rows[-1]['id']
+
+    def lines(self):
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<urlset ' \
+            'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        for line in self:
+            yield etree.tostring(line) + '\n'
+        yield '</urlset>'
+
+    def render(self):
+        return render_sitemap(
+            get_sitemap_cache_key(self.model, self.domain, self.page),
+            self.lines(), self.cache_timeout
+        )
+
+    def loc(self, row):
+        return url_for(
+            '%s.render' % self.model.__name__,
+            uri=row[self.uri_field], _external=True
+        )
+
+    def lastmod(self, row):
+        return w3c_datetime(row['write_date'] or row['create_date'])
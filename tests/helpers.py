@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+'''
+
+    nereid_cms test helpers
+
+    :copyright: (c) 2010-2013 by Openlabs Technologies & Consulting (P) Ltd.
+    :license: GPLv3, see LICENSE for more details
+
+'''
+from contextlib import contextmanager
+
+_missing = object()
+
+
+@contextmanager
+def patched(obj, **attributes):
+    """
+    Sets the given attributes of `obj` within the block and restores them
+    when it exits, even if an assertion fails. Functions replacing methods
+    of a model are wrapped in `staticmethod`.
+    """
+    saved = dict(
+        (name, obj.__dict__.get(name, _missing)) for name in attributes
+    )
+    for name, value in attributes.iteritems():
+        setattr(obj, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.iteritems():
+            if value is _missing:
+                delattr(obj, name)
+            else:
+                setattr(obj, name, value)
+
+
+def failing(test, message):
+    """
+    Returns a replacement for a method of a model which fails `test` when
+    it is called
+    """
+    def fail(*args, **kwargs):
+        test.fail(message)
+    return staticmethod(fail)
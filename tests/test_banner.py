@@ -153,6 +153,44 @@ class TestBanner(NereidTestCase):
             self.assertEqual(len(banner_categ1.published_banners), 1)
             self.assertEqual(len(banner_categ1.published_banners), 1)
 
+    def test_0015_published_banners_many(self):
+        """
+        The published banners of several categories are read together,
+        in the order of their sequence.
+        """
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            categories = self.BannerCategory.create([{
+                'name': 'CAT-A'
+            }, {
+                'name': 'CAT-B'
+            }, {
+                'name': 'CAT-C'
+            }])
+            banners = self.Banner.create([{
+                'name': name,
+                'category': category,
+                'type': 'custom_code',
+                'custom_code': name,
+                'sequence': sequence,
+                'state': state,
+            } for name, category, sequence, state in [
+                ('A1', categories[0], 2, 'published'),
+                ('A2', categories[0], 1, 'published'),
+                ('B1', categories[1], 1, 'archived'),
+                ('B2', categories[1], 2, 'published'),
+            ]])
+
+            values = self.BannerCategory.read(
+                map(int, categories), ['published_banners']
+            )
+            self.assertEqual(
+                dict((v['id'], v['published_banners']) for v in values), {
+                    categories[0].id: [banners[1].id, banners[0].id],
+                    categories[1].id: [banners[3].id],
+                    categories[2].id: [],
+                }
+            )
+
     def test_0020_banner_image(self):
         """
         Test the image type banner created using static files
@@ -242,6 +280,38 @@ class TestBanner(NereidTestCase):
                     'some ultra complex custom code' in response.data,
                 )
 
+    def test_0050_published_banners_html(self):
+        """
+        Render the HTML of the published banners of a category in the
+        order of their sequence.
+        """
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            site = self.setup_defaults()
+
+            category, = self.BannerCategory.create([{
+                'name': 'test-banners',
+                'website': site
+            }])
+            self.Banner.create([{
+                'name': 'Banner %d' % sequence,
+                'category': category,
+                'type': 'custom_code',
+                'custom_code': 'Code %d' % sequence,
+                'sequence': sequence,
+                'state': state,
+            } for sequence, state in [
+                (3, 'published'), (1, 'published'), (2, 'archived'),
+            ]])
+            self.templates['home.jinja'] = '''
+                {%- set category = get_banner_category("test-banners") -%}
+                {{ category.get_published_banners_html()|join(',') }}
+            '''
+
+            app = self.get_app()
+            with app.test_client() as c:
+                response = c.get('/en_US/')
+            self.assertEqual(response.data.strip(), 'Code 1,Code 3')
+
 
 class TestGetHtml(NereidTestCase):
     """Test Get Html for Banners
@@ -413,6 +483,83 @@ class TestGetHtml(NereidTestCase):
             rv = banner.get_html()
             self.assertEqual(rv, banner.custom_code)
 
+    def test_0040_get_html_cache(self):
+        """
+        The HTML of banners is cached until the banner or its static file
+        changes.
+        """
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            site = self.setup_defaults()
+
+            banner_category, = self.BannerCategory.create([{
+                'name': 'Category A',
+                'website': site,
+            }])
+            image, = self.Folder.create([{
+                'description': 'image',
+                'folder_name': 'image'
+            }])
+            file, = self.File.create([{
+                'name': 'logo',
+                'folder': image,
+            }])
+            banner, = self.Banner.create([{
+                'name': 'Test Banner1',
+                'category': banner_category,
+                'type': 'image',
+                'file': file,
+                'alternative_text': 'Logo',
+                'state': 'published'
+            }])
+
+            app = self.get_app(
+                CACHE_TYPE='werkzeug.contrib.cache.SimpleCache'
+            )
+
+            def get_image():
+                with app.test_client() as c:
+                    rv = c.get('/')
+                return objectify.fromstring(rv.data).find('img')
+
+            self.assertEqual(get_image().get('alt'), 'Logo')
+
+            self.File.write([file], {'name': 'logo2'})
+            self.assertEqual(
+                get_image().get('src'), '/en_US/static-file/image/logo2'
+            )
+
+            self.Banner.write([banner], {'alternative_text': 'New Logo'})
+            self.assertEqual(get_image().get('alt'), 'New Logo')
+
+    def test_0050_get_html_many(self):
+        """
+        Render the HTML of several banners at once.
+        """
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            site = self.setup_defaults()
+
+            banner_category, = self.BannerCategory.create([{
+                'name': 'Category A',
+                'website': site,
+            }])
+            self.Banner.create([{
+                'name': 'Banner %d' % sequence,
+                'category': banner_category,
+                'type': 'custom_code',
+                'custom_code': 'Code %d' % sequence,
+                'sequence': sequence,
+                'state': 'published'
+            } for sequence in (3, 1, 2)])
+            self.templates['home.jinja'] = '''
+                {%- set banners = get_banner_category('Category A').banners -%}
+                {{ banners[0].get_html_many(banners)|join(',') }}
+            '''
+
+            app = self.get_app()
+            with app.test_client() as c:
+                rv = c.get('/')
+            self.assertEqual(rv.data.strip(), 'Code 1,Code 2,Code 3')
+
 
 def suite():
     "Nereid CMS Banners test suite"
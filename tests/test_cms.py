@@ -7,6 +7,10 @@
     :license: GPLv3, see LICENSE for more details
 
 '''
+import os
+import re
+import shutil
+import tempfile
 import unittest
 
 import trytond.tests.test_tryton
@@ -14,6 +18,12 @@ from trytond.tests.test_tryton import POOL, USER, DB_NAME, CONTEXT, \
     test_view, test_depends
 from nereid.testing import NereidTestCase
 from trytond.transaction import Transaction
+from trytond.exceptions import UserError
+from trytond.backend import Cursor
+from trytond.modules.nereid_cms.export import StaticExporter
+from trytond.modules.nereid_cms.instrumentation import get_counters, \
+    reset_counters, render_counters, install_instrumentation
+from trytond.modules.nereid_cms.tests.helpers import patched, failing
 
 
 class TestCMS(NereidTestCase):
@@ -201,6 +211,957 @@ class TestCMS(NereidTestCase):
             self.Article.delete([article1])
             self.assertEqual(self.ArticleAttribute.search([], count=True), 0)
 
+    def test_0060_article_response_cache(self):
+        '''
+        Rendered articles are cached for anonymous visitors when enabled
+        '''
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app(
+                CACHE_TYPE='werkzeug.contrib.cache.SimpleCache'
+            )
+            article, = self.Article.search([('uri', '=', 'test-article')])
+            fail = failing(self, 'The article was looked up from the database')
+
+            with patched(self.Article, response_cache_timeout=60):
+                with app.test_client() as c:
+                    response = c.get('/en_US/article/test-article')
+                    self.assertEqual(response.data, 'Test Content')
+                    etag = response.headers['ETag']
+                    self.assertTrue(response.headers['Last-Modified'])
+
+                    # Served from the cache without any search
+                    with patched(self.Article, search=fail):
+                        response = c.get('/en_US/article/test-article')
+                        self.assertEqual(response.data, 'Test Content')
+                        response = c.get(
+                            '/en_US/article/test-article',
+                            headers=[('If-None-Match', etag)]
+                        )
+                        self.assertEqual(response.status_code, 304)
+
+                    # Changes to the article invalidate the cache
+                    self.templates['article-sequence.jinja'] = \
+                        '{{ article.sequence }}'
+                    self.Article.write([article], {
+                        'template': 'article-sequence.jinja',
+                        'sequence': 20,
+                    })
+                    response = c.get('/en_US/article/test-article')
+                    self.assertEqual(response.data, '20')
+
+                # Pages showing the data of a session are not shared
+                self.templates['article-sequence.jinja'] = (
+                    '{{ get_flashed_messages()|join }}{{ article.sequence }}'
+                )
+                with app.test_client() as c:
+                    with c.session_transaction() as session:
+                        session['_flashes'] = [('message', 'Flashed')]
+                    response = c.get('/en_US/article/test-article')
+                    self.assertEqual(response.data, 'Flashed20')
+                with app.test_client() as c:
+                    response = c.get('/en_US/article/test-article')
+                    self.assertEqual(response.data, '20')
+
+    def test_0070_conditional_get(self):
+        '''
+        Articles and categories answer conditional requests with a 304
+        '''
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app()
+            article, = self.Article.search([('uri', '=', 'test-article')])
+
+            with app.test_client() as c:
+                response = c.get('/en_US/article/test-article')
+                self.assertEqual(response.status_code, 200)
+                etag = response.headers['ETag']
+                last_modified = response.headers['Last-Modified']
+
+                response = c.get(
+                    '/en_US/article/test-article',
+                    headers=[('If-None-Match', etag)]
+                )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.headers['ETag'], etag)
+
+                # Changes to the related records change the ETag
+                attribute, = self.ArticleAttribute.create([{
+                    'name': 'google+',
+                    'value': 'abc',
+                    'article': article,
+                }])
+                response = c.get(
+                    '/en_US/article/test-article',
+                    headers=[('If-None-Match', etag)]
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data, 'Test Content')
+                self.assertNotEqual(response.headers['ETag'], etag)
+
+                # Deletions do not move the modification time forward, so
+                # only the ETag is trusted
+                etag = response.headers['ETag']
+                self.ArticleAttribute.delete([attribute])
+                response = c.get(
+                    '/en_US/article/test-article',
+                    headers=[('If-Modified-Since', last_modified)]
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response.headers['ETag'], etag)
+
+                response = c.get('/en_US/article-category/test-categ')
+                self.assertEqual(response.status_code, 200)
+                etag = response.headers['ETag']
+                response = c.get(
+                    '/en_US/article-category/test-categ',
+                    headers=[('If-None-Match', etag)]
+                )
+                self.assertEqual(response.status_code, 304)
+
+                self.Article.create([{
+                    'title': 'Another Article',
+                    'uri': 'another-article',
+                    'content': 'Another Content',
+                    'sequence': 20,
+                    'category': article.category,
+                }])
+                response = c.get(
+                    '/en_US/article-category/test-categ',
+                    headers=[('If-None-Match', etag)]
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data, '2')
+
+    def test_0075_translation_validators(self):
+        '''
+        Editing the translations of an article changes its ETag and
+        invalidates its cached pages
+        '''
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app()
+            CacheVersion = POOL.get('nereid.cms.cache.version')
+            Translation = POOL.get('ir.translation')
+            fr_fr, = self.Language.search([('code', '=', 'fr_FR')])
+            self.Language.write([fr_fr], {'translatable': True})
+            article, = self.Article.search([('uri', '=', 'test-article')])
+            with Transaction().set_context(language='fr_FR'):
+                self.Article.write([article], {'title': 'Article'})
+
+            with app.test_client() as c:
+                response = c.get('/fr_FR/article/test-article')
+                self.assertEqual(response.status_code, 200)
+                etag = response.headers['ETag']
+
+                version = CacheVersion.get_version('nereid.cms.article')
+                translation, = Translation.search([
+                    ('name', '=', 'nereid.cms.article,title'),
+                    ('res_id', '=', article.id),
+                    ('lang', '=', 'fr_FR'),
+                ])
+                Translation.write([translation], {'value': 'Un article'})
+                self.assertTrue(
+                    CacheVersion.get_version('nereid.cms.article') > version
+                )
+                response = c.get(
+                    '/fr_FR/article/test-article',
+                    headers=[('If-None-Match', etag)]
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_0078_layout_validators(self):
+        '''
+        The ETags change with the menus, the templates and the authors of
+        the articles of a category
+        '''
+        Menu = POOL.get('nereid.cms.menu')
+        Employee = POOL.get('company.employee')
+
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app()
+            article, = self.Article.search([('uri', '=', 'test-article')])
+            company, = self.Company.search([])
+            party, = self.Party.create([{'name': 'Author'}])
+            employee, = Employee.create([{
+                'party': party,
+                'company': company,
+            }])
+            self.Article.write([article], {'author': employee})
+
+            def get_etag(path):
+                with app.test_client() as c:
+                    response = c.get(path)
+                    self.assertEqual(response.status_code, 200)
+                    return response.headers['ETag']
+
+            etag = get_etag('/en_US/article/test-article')
+            # Like any change to the menus
+            Menu.invalidate_cache()
+            self.assertNotEqual(get_etag('/en_US/article/test-article'), etag)
+
+            etag = get_etag('/en_US/article/test-article')
+            app.config['NEREID_CMS_TEMPLATE_VERSION'] = 'deploy-2'
+            self.assertNotEqual(get_etag('/en_US/article/test-article'), etag)
+
+            etag = get_etag('/en_US/article-category/test-categ')
+            self.Party.write([party], {'name': 'Another Author'})
+            self.assertNotEqual(
+                get_etag('/en_US/article-category/test-categ'), etag
+            )
+
+    def test_0080_article_sitemap(self):
+        '''
+        Article sitemaps list the active articles and are cached until an
+        article changes
+        '''
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app(
+                CACHE_TYPE='werkzeug.contrib.cache.SimpleCache'
+            )
+            article, = self.Article.search([('uri', '=', 'test-article')])
+            self.Article.create([{
+                'title': 'Inactive Article',
+                'uri': 'inactive-article',
+                'content': 'Inactive Content',
+                'sequence': 20,
+                'category': article.category,
+                'active': False,
+            }])
+
+            with app.test_client() as c:
+                response = c.get('/en_US/sitemaps/article-index.xml')
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(
+                    '/en_US/sitemaps/article-1.xml' in response.data
+                )
+                self.assertEqual(response.data.count('<lastmod>'), 1)
+
+                response = c.get('/en_US/sitemaps/article-1.xml')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.mimetype, 'application/xml')
+                self.assertTrue('/article/test-article' in response.data)
+                self.assertFalse('inactive-article' in response.data)
+                self.assertTrue('<lastmod>' in response.data)
+
+                with patched(self.Article, search_read=failing(
+                        self, 'The sitemap was generated again')):
+                    response = c.get('/en_US/sitemaps/article-1.xml')
+                    self.assertTrue(
+                        '/article/test-article' in response.data
+                    )
+
+                self.Article.write([article], {'uri': 'renamed-article'})
+                response = c.get('/en_US/sitemaps/article-1.xml')
+                self.assertTrue('/article/renamed-article' in response.data)
+
+    def test_0090_category_keyset_pagination(self):
+        '''
+        Category pages seek to the articles after the cursor
+        '''
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app()
+            article, = self.Article.search([('uri', '=', 'test-article')])
+            self.Article.create([{
+                'title': 'Article %d' % sequence,
+                'uri': 'article-%d' % sequence,
+                'content': 'Content',
+                'sequence': sequence,
+                'category': article.category,
+            } for sequence in (5, 10, 20)])
+            self.templates['article-category.jinja'] = (
+                '{% for article in articles %}{{ article.uri }},{% endfor %}'
+                '{{ articles.next_cursor or "" }}'
+            )
+
+            with patched(self.ArticleCategory, per_page=2):
+                with app.test_client() as c:
+                    response = c.get('/en_US/article-category/test-categ')
+                    uris, cursor = response.data.rsplit(',', 1)
+                    self.assertEqual(uris, 'article-5,test-article')
+                    self.assertEqual(int(cursor), article.id)
+
+                    execute = Cursor.execute
+                    queries = []
+
+                    def recording_execute(cursor, sql, params=None):
+                        if '"nereid_cms_article"' in sql:
+                            queries.append((sql, params))
+                        return execute(cursor, sql, params)
+
+                    with patched(Cursor, execute=recording_execute):
+                        response = c.get(
+                            '/en_US/article-category/test-categ?after=%s'
+                            % cursor
+                        )
+                    self.assertEqual(response.data, 'article-10,article-20,')
+
+            # The first field of the order is bounded by the cursor on its
+            # own, so that its index is used to seek to the cursor
+            self.assertTrue([
+                sql for sql, params in queries
+                if re.search(r'"sequence" >= %s', sql) and 10 in params
+            ])
+
+    def test_0100_composite_indexes(self):
+        '''
+        The composite indexes exist once the module is installed
+        '''
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            for model in (
+                    'nereid.cms.banner.category', 'nereid.cms.banner',
+                    'nereid.cms.article'):
+                Model = POOL.get(model)
+                self.assertTrue(Model._composite_indexes)
+                self.assertEqual(Model.missing_indexes(), [])
+
+            index_name = self.Article.get_index_name(
+                ('category', 'sequence', 'id'), 'active'
+            )
+            self.assertNotEqual(
+                index_name, self.Article.get_index_name(
+                    ('category', 'sequence', 'id'), 'NOT active'
+                )
+            )
+            Transaction().cursor.execute('DROP INDEX "%s"' % index_name)
+            self.assertEqual(self.Article.missing_indexes(), [index_name])
+
+    def test_0110_article_uri_map(self):
+        '''
+        The uris of articles are resolved per language through the map
+        '''
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            ArticleURI = POOL.get('nereid.cms.article.uri')
+            Translation = POOL.get('ir.translation')
+            fr_fr, = self.Language.search([('code', '=', 'fr_FR')])
+            self.Language.write([fr_fr], {'translatable': True})
+            article, = self.Article.search([('uri', '=', 'test-article')])
+
+            with Transaction().set_context(language='en_US'):
+                self.assertEqual(
+                    ArticleURI.resolve('test-article'), [article.id]
+                )
+
+            with Transaction().set_context(language='fr_FR'):
+                self.Article.write([article], {'uri': 'article-fr'})
+                self.assertEqual(
+                    ArticleURI.resolve('article-fr'), [article.id]
+                )
+                self.assertEqual(
+                    self.Article.search_by_uri('article-fr'), [article]
+                )
+                self.assertEqual(ArticleURI.resolve('test-article'), [])
+
+            with Transaction().set_context(language='en_US'):
+                self.assertEqual(
+                    ArticleURI.resolve('test-article'), [article.id]
+                )
+
+            # Removing the translation falls back to the default uri
+            Translation.delete(Translation.search([
+                ('name', '=', 'nereid.cms.article,uri'),
+                ('res_id', '=', article.id),
+                ('lang', '=', 'fr_FR'),
+            ]))
+            with Transaction().set_context(language='fr_FR'):
+                self.assertEqual(ArticleURI.resolve('article-fr'), [])
+                self.assertEqual(
+                    ArticleURI.resolve('test-article'), [article.id]
+                )
+
+            # The map is trusted in the mapped languages, while the uris
+            # are searched in the others
+            ArticleURI.delete(ArticleURI.search([]))
+            self.assertEqual(self.Article.search_by_uri('test-article'), [])
+            with Transaction().set_context(language='de_DE'):
+                self.assertEqual(
+                    self.Article.search_by_uri('test-article'), [article]
+                )
+            ArticleURI.rebuild()
+            self.assertEqual(
+                self.Article.search_by_uri('test-article'), [article]
+            )
+
+            # An article has a single uri per language
+            self.assertRaises(UserError, ArticleURI.create, [{
+                'language': 'en_US',
+                'uri': 'other-uri',
+                'article': article.id,
+            }])
+
+    def test_0120_uri_routing_table(self):
+        '''
+        Uris are resolved from the routing table until they change
+        '''
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app()
+            self.Article._routes_cache.clear()
+            self.ArticleCategory._routes_cache.clear()
+            article, = self.Article.search([('uri', '=', 'test-article')])
+
+            fail = failing(self, 'The uri was looked up in the database')
+
+            with app.test_client() as c:
+                response = c.get('/en_US/article/test-article')
+                self.assertEqual(response.data, 'Test Content')
+                response = c.get('/en_US/article-category/test-categ')
+                self.assertEqual(response.data, '1')
+
+                with patched(self.Article, lookup_uri=fail), \
+                        patched(self.ArticleCategory, lookup_uri=fail):
+                    response = c.get('/en_US/article/test-article')
+                    self.assertEqual(response.data, 'Test Content')
+                    response = c.get('/en_US/article-category/test-categ')
+                    self.assertEqual(response.data, '1')
+
+                # Unknown uris are looked up again rather than cached
+                response = c.get('/en_US/article/unknown-article')
+                self.assertEqual(response.status_code, 404)
+                with patched(self.Article, lookup_uri=fail):
+                    self.assertRaises(
+                        AssertionError, c.get, '/en_US/article/unknown-article'
+                    )
+
+                # Renaming invalidates the routes
+                self.Article.write([article], {'uri': 'renamed-article'})
+                self.ArticleCategory.write(
+                    [article.category], {'unique_name': 'renamed-categ'}
+                )
+                response = c.get('/en_US/article/test-article')
+                self.assertEqual(response.status_code, 404)
+                response = c.get('/en_US/article/renamed-article')
+                self.assertEqual(response.data, 'Test Content')
+                response = c.get('/en_US/article-category/test-categ')
+                self.assertEqual(response.status_code, 404)
+                response = c.get('/en_US/article-category/renamed-categ')
+                self.assertEqual(response.data, '1')
+
+                # Deactivated articles are not found anymore
+                self.Article.write([article], {'active': False})
+                response = c.get('/en_US/article/renamed-article')
+                self.assertEqual(response.status_code, 404)
+
+    def test_0130_static_export(self):
+        '''
+        The pages are exported to static files, incrementally when asked
+        '''
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app()
+            article, = self.Article.search([('uri', '=', 'test-article')])
+            category = article.category
+            directory = tempfile.mkdtemp()
+            try:
+                exporter = StaticExporter(app, directory)
+                self.assertEqual(exporter.export(), [])
+
+                article_file = os.path.join(
+                    directory, 'en_US', 'article', 'test-article',
+                    'index.html'
+                )
+                category_file = os.path.join(
+                    directory, 'en_US', 'article-category', 'test-categ',
+                    'index.html'
+                )
+                with open(article_file) as page_file:
+                    self.assertEqual(page_file.read(), 'Test Content')
+                with open(category_file) as page_file:
+                    self.assertEqual(page_file.read(), '1')
+                self.assertTrue(os.path.exists(os.path.join(
+                    directory, 'en_US', 'sitemaps', 'article-1.xml'
+                )))
+
+                # Unchanged pages are not rendered again
+                with open(article_file, 'w') as page_file:
+                    page_file.write('Unchanged')
+                self.assertEqual(exporter.export(incremental=True), [])
+                with open(article_file) as page_file:
+                    self.assertEqual(page_file.read(), 'Unchanged')
+
+                # Changes to the related records change the ETag
+                self.ArticleAttribute.create([{
+                    'name': 'google+',
+                    'value': 'abc',
+                    'article': article,
+                }])
+                self.assertEqual(exporter.export(incremental=True), [])
+                with open(article_file) as page_file:
+                    self.assertEqual(page_file.read(), 'Test Content')
+
+                # Pages which no longer exist are removed
+                stale_sitemap = os.path.join(
+                    directory, 'en_US', 'sitemaps', 'article-2.xml'
+                )
+                etags = exporter.load_state()
+                etags['/en_US/sitemaps/article-2.xml'] = None
+                exporter.save_state(etags)
+                with open(stale_sitemap, 'w') as page_file:
+                    page_file.write('Stale')
+                self.assertEqual(exporter.export(incremental=True), [])
+                self.assertFalse(os.path.exists(stale_sitemap))
+
+                self.Article.write([article], {'uri': 'renamed-article'})
+                self.assertEqual(exporter.export(incremental=True), [])
+                self.assertFalse(os.path.exists(article_file))
+                self.assertTrue(os.path.exists(os.path.join(
+                    directory, 'en_US', 'article', 'renamed-article',
+                    'index.html'
+                )))
+
+                self.Article.delete([article])
+                self.assertEqual(exporter.export(incremental=True), [])
+                self.assertFalse(os.path.exists(os.path.join(
+                    directory, 'en_US', 'article', 'renamed-article',
+                    'index.html'
+                )))
+                with open(category_file) as page_file:
+                    self.assertEqual(page_file.read(), '0')
+
+                # Uris cannot write or remove pages out of their directory
+                dotted, = self.Article.create([{
+                    'title': 'Dotted',
+                    'uri': '..',
+                    'content': 'Dotted',
+                    'sequence': 10,
+                    'category': category,
+                }])
+                self.assertEqual(
+                    exporter.export(incremental=True),
+                    ['/en_US/article/..']
+                )
+                self.Article.delete([dotted])
+                self.assertEqual(exporter.export(incremental=True), [])
+                self.assertTrue(os.path.exists(category_file))
+
+                # The ETags are computed with as many queries whatever the
+                # number of articles
+                def count_queries():
+                    execute = Cursor.execute
+                    queries = []
+
+                    def recording_execute(cursor, sql, params=None):
+                        queries.append(sql)
+                        return execute(cursor, sql, params)
+
+                    with patched(Cursor, execute=recording_execute):
+                        with app.test_request_context('/'):
+                            exporter.get_pages()
+                    return len(queries)
+
+                def create_articles(indexes):
+                    self.Article.create([{
+                        'title': 'Article %d' % index,
+                        'uri': 'article-%d' % index,
+                        'content': 'Content',
+                        'sequence': index,
+                        'category': category,
+                    } for index in indexes])
+
+                create_articles([0])
+                queries = count_queries()
+                create_articles(range(1, 6))
+                self.assertEqual(count_queries(), queries)
+            finally:
+                shutil.rmtree(directory)
+
+    def test_0140_instrumentation(self):
+        '''
+        The queries, time and cache lookups of the entry points are
+        reported per request and summed up in the counters
+        '''
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app(
+                NEREID_CMS_STATS_HEADER=True, NEREID_CMS_METRICS_TOKEN='secret'
+            )
+            install_instrumentation(app)
+            reset_counters()
+
+            with app.test_client() as c:
+                response = c.get('/en_US/article/test-article')
+                self.assertEqual(response.status_code, 200)
+                stats = dict(
+                    entry.strip().split(';', 1) for entry in
+                    response.headers['X-Nereid-CMS-Stats'].split(',')
+                )
+                self.assertTrue(
+                    stats['nereid.cms.article.render'].startswith('calls=1;')
+                )
+                self.assertTrue(
+                    'nereid.cms.article.render.template' in stats
+                )
+
+                response = c.get('/en_US/article/test-article')
+                self.assertEqual(response.status_code, 200)
+
+            counters = get_counters()
+            render = counters['nereid.cms.article.render']
+            self.assertEqual(render['calls'], 2)
+            self.assertTrue(render['queries'] > 0)
+            self.assertTrue(render['time'] > 0)
+            # The uri was looked up from the routing table the second time
+            self.assertTrue(render['hits'] >= 1)
+            template = counters['nereid.cms.article.render.template']
+            self.assertTrue(render['queries'] >= template['queries'])
+
+            self.assertTrue(
+                'nereid_cms_calls_total'
+                '{entry_point="nereid.cms.article.render"} 2'
+                in render_counters()
+            )
+
+            # The counters are only served to the scrapers with the token
+            with app.test_client() as c:
+                response = c.get(
+                    '/_nereid_cms/metrics',
+                    headers=[('Authorization', 'Bearer secret')]
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue('nereid_cms_queries_total' in response.data)
+                response = c.get(
+                    '/_nereid_cms/metrics',
+                    headers=[('Authorization', 'Bearer guess')],
+                    environ_base={'REMOTE_ADDR': '127.0.0.1'}
+                )
+                self.assertEqual(response.status_code, 404)
+
+    def test_0150_link_selections(self):
+        '''
+        The selections of links and models are cached until the links or
+        the models change in any worker
+        '''
+        CMSLink = POOL.get('nereid.cms.link')
+        Model = POOL.get('ir.model')
+        CacheVersion = POOL.get('nereid.cms.cache.version')
+
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            CMSLink._links_cache.clear()
+            CMSLink._models_cache.clear()
+
+            self.assertEqual(self.Article.links_get(), [('', '')])
+            models = CMSLink.models_get()
+            self.assertTrue(('nereid.cms.article', 'CMS Articles') in models)
+
+            fail = failing(self, 'The selection was not cached')
+            with patched(CMSLink, search=fail), patched(Model, search=fail):
+                self.assertEqual(self.Article.links_get(), [('', '')])
+                self.assertEqual(CMSLink.models_get(), models)
+
+            CMSLink.create([{
+                'name': 'Article',
+                'model': 'nereid.cms.article',
+            }])
+            self.assertEqual(
+                POOL.get('nereid.cms.menuitem').links_get(),
+                [('', ''), ('nereid.cms.article', 'Article')]
+            )
+
+            model, = Model.search([('model', '=', 'nereid.cms.article')])
+            Model.write([model], {'name': 'Articles'})
+            self.assertTrue(
+                ('nereid.cms.article', 'Articles') in CMSLink.models_get()
+            )
+
+            # The changes made by other workers are seen through the cache
+            # version of the selection
+            stale = [('', ''), ('nereid.cms.article', 'Stale')]
+            CMSLink._links_cache.set(Transaction().language, (
+                CacheVersion.get_version('nereid.cms.link.links'), stale
+            ))
+            self.assertEqual(self.Article.links_get(), stale)
+            CacheVersion.bump(['nereid.cms.link.links'])
+            self.assertEqual(
+                self.Article.links_get(),
+                [('', ''), ('nereid.cms.article', 'Article')]
+            )
+
+    def test_0160_reference_urls(self):
+        '''
+        The references of many records are resolved with a read per model
+        '''
+        CMSLink = POOL.get('nereid.cms.link')
+
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app()
+            CMSLink.create([{
+                'name': 'Article',
+                'model': 'nereid.cms.article',
+            }, {
+                'name': 'Category',
+                'model': 'nereid.cms.article.category',
+            }])
+            article, = self.Article.search([('uri', '=', 'test-article')])
+            linked = self.Article.create([{
+                'title': 'Article %d' % index,
+                'uri': 'article-%d' % index,
+                'content': 'Content',
+                'sequence': 20 + index,
+                'category': article.category,
+                'reference': reference,
+            } for index, reference in enumerate([
+                'nereid.cms.article,%d' % article.id,
+                'nereid.cms.article.category,%d' % article.category.id,
+                None,
+            ])])
+
+            search_read = self.Article.search_read
+            calls = []
+
+            def counting_search_read(*args, **kwargs):
+                calls.append(args)
+                return search_read(*args, **kwargs)
+
+            with app.test_request_context('/en_US/'):
+                with patched(self.Article, search_read=staticmethod(
+                        counting_search_read)):
+                    urls = CMSLink.get_reference_urls(linked)
+                self.assertEqual(len(calls), 1)
+                self.assertEqual(urls, {
+                    linked[0].id: '/en_US/article/test-article',
+                    linked[1].id: '/en_US/article-category/test-categ',
+                    linked[2].id: None,
+                })
+
+                # Active records are accepted as well as reference strings
+                self.assertEqual(
+                    CMSLink.resolve_references([
+                        article, 'nereid.cms.article,%d' % linked[0].id,
+                        'nereid.cms.article,0', '',
+                    ]), {
+                        'nereid.cms.article,%d' % article.id:
+                            '/en_US/article/test-article',
+                        'nereid.cms.article,%d' % linked[0].id:
+                            '/en_US/article/article-0',
+                    }
+                )
+
+    def test_0170_category_relations(self):
+        '''
+        The relations of the articles of a category page are read in bulk
+        by Tryton, so the template runs as many queries whatever the number
+        of articles
+        '''
+        Employee = POOL.get('company.employee')
+
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app(NEREID_CMS_STATS_HEADER=True)
+            install_instrumentation(app)
+            category, = self.ArticleCategory.search([])
+            company, = self.Company.search([])
+            folder, = self.Folder.create([{
+                'folder_name': 'images',
+            }])
+            employees = Employee.create([{
+                'party': self.Party.create([{'name': 'Author %d' % index}])[0],
+                'company': company,
+            } for index in range(2)])
+
+            def create_articles(indexes):
+                for index in indexes:
+                    image, = self.File.create([{
+                        'name': 'image-%d.png' % index,
+                        'folder': folder,
+                    }])
+                    self.Article.create([{
+                        'title': 'Article %d' % index,
+                        'uri': 'article-%d' % index,
+                        'content': 'Content',
+                        'sequence': 20 + index,
+                        'category': category,
+                        'image': image,
+                        'author': employees[index % 2],
+                        'attributes': [('create', [{
+                            'name': 'google+',
+                            'value': 'article-%d' % index,
+                        }])],
+                    }])
+
+            self.templates['article-category.jinja'] = (
+                '{% for article in articles.items() %}'
+                '{% if article.image %}{{ article.image.url }}|'
+                '{{ article.author.rec_name }}|'
+                '{{ article.attributes|length }};{% endif %}'
+                '{% endfor %}'
+            )
+
+            def render():
+                # Nothing read by the previous requests or the setup
+                Transaction().cursor.cache.clear()
+                with app.test_client() as c:
+                    response = c.get('/en_US/article-category/test-categ')
+                    self.assertEqual(response.status_code, 200)
+                    stats = dict(
+                        entry.strip().split(';', 1) for entry in
+                        response.headers['X-Nereid-CMS-Stats'].split(',')
+                    )
+                    queries = dict(
+                        item.split('=') for item in stats[
+                            'nereid.cms.article.category.render.template'
+                        ].split(';')
+                    )['queries']
+                    return response.data, int(queries)
+
+            create_articles(range(3))
+            # The first request fills the caches of Tryton
+            render()
+            data, queries = render()
+            self.assertTrue(
+                '/static-file/images/image-2.png|Author 0|1;' in data
+            )
+            create_articles(range(3, 9))
+            data, more_queries = render()
+            self.assertEqual(data.count(';'), 9)
+            self.assertEqual(more_queries, queries)
+
+    def test_0180_article_summaries(self):
+        '''
+        The summaries of the content of articles are stored per language
+        when the content is written
+        '''
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            ArticleSummary = POOL.get('nereid.cms.article.summary')
+            Translation = POOL.get('ir.translation')
+            fr_fr, = self.Language.search([('code', '=', 'fr_FR')])
+            self.Language.write([fr_fr], {'translatable': True})
+            article, = self.Article.search([('uri', '=', 'test-article')])
+
+            self.assertEqual(article.excerpt, 'Test Content')
+            self.assertEqual(article.word_count, 2)
+            self.assertEqual(article.reading_time, 1)
+            self.assertEqual(article.first_image, None)
+
+            self.Article.write([article], {
+                'content': (
+                    '<p>An <b>image</b>:</p><img src="/a.png"/>'
+                    '<script>var hidden;</script>'
+                    '<p>%s</p><img src="/b.png"/>' % ('word ' * 500)
+                ),
+            })
+            # The summaries are synced once for a write in another language
+            sync = ArticleSummary.sync.im_func
+            synced = []
+
+            def counting_sync(cls, articles, languages=None):
+                synced.append(articles)
+                return sync(cls, articles, languages)
+
+            with patched(ArticleSummary, sync=classmethod(counting_sync)):
+                with Transaction().set_context(language='fr_FR'):
+                    self.Article.write([article], {
+                        'content': '<p>Contenu</p>',
+                    })
+            self.assertEqual(len(synced), 1)
+
+            # The languages which are not mapped show the summary of the
+            # default language, like its content
+            with Transaction().set_context(language='de_DE'):
+                article = self.Article(article.id)
+                self.assertEqual(article.word_count, 502)
+
+            with Transaction().set_context(language='en_US'):
+                article = self.Article(article.id)
+                self.assertEqual(article.word_count, 502)
+                self.assertEqual(article.reading_time, 3)
+                self.assertEqual(article.first_image, '/a.png')
+                self.assertTrue(
+                    article.excerpt.startswith('An image: word word')
+                )
+                self.assertTrue(article.excerpt.endswith(u'…'))
+                self.assertTrue(
+                    len(article.excerpt) <= ArticleSummary.excerpt_length + 1
+                )
+            with Transaction().set_context(language='fr_FR'):
+                article = self.Article(article.id)
+                self.assertEqual(article.excerpt, 'Contenu')
+                self.assertEqual(article.word_count, 1)
+
+            # Removing the translation falls back to the default content
+            Translation.delete(Translation.search([
+                ('name', '=', 'nereid.cms.article,content'),
+                ('res_id', '=', article.id),
+                ('lang', '=', 'fr_FR'),
+            ]))
+            with Transaction().set_context(language='fr_FR'):
+                article = self.Article(article.id)
+                self.assertEqual(article.word_count, 502)
+
+            # Reading an article computes its missing summaries without
+            # storing them, which is left to a rebuild
+            ArticleSummary.delete(ArticleSummary.search([]))
+            article = self.Article(article.id)
+            self.assertEqual(article.first_image, '/a.png')
+            self.assertEqual(article.word_count, 502)
+            self.assertEqual(ArticleSummary.search([], count=True), 0)
+            ArticleSummary.rebuild()
+            article = self.Article(article.id)
+            self.assertEqual(article.first_image, '/a.png')
+            self.assertEqual(
+                ArticleSummary.search([
+                    ('article', '=', article.id),
+                ], count=True), 2
+            )
+
+            # An article has a single summary per language
+            self.assertRaises(UserError, ArticleSummary.create, [{
+                'article': article.id,
+                'language': 'en_US',
+                'word_count': 1,
+            }])
+
+    def test_0190_listing_columns(self):
+        '''
+        Listings and sitemaps of articles do not read their content or
+        description
+        '''
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app()
+            self.Article.write(self.Article.search([]), {
+                'description': 'A description',
+            })
+            self.templates['article-category.jinja'] = (
+                '{% for article in articles.items() %}'
+                '<a href="{{ article.get_absolute_url() }}">'
+                '{{ article.title }} {{ article.published_on }} '
+                '{{ article.image }} {{ article.author }} '
+                '{{ article.excerpt }}</a>'
+                '{% endfor %}'
+            )
+
+            execute = Cursor.execute
+            queries = []
+
+            def recording_execute(cursor, sql, params=None):
+                if '"nereid_cms_article"' in sql:
+                    queries.append(sql)
+                return execute(cursor, sql, params)
+
+            with patched(Cursor, execute=recording_execute):
+                with app.test_client() as c:
+                    response = c.get('/en_US/article-category/test-categ')
+                    self.assertEqual(response.status_code, 200)
+                    self.assertTrue(
+                        '/en_US/article/test-article' in response.data
+                    )
+                    self.assertTrue('Test Content' in response.data)
+                    response = c.get('/en_US/sitemaps/article-1.xml')
+                    self.assertEqual(response.status_code, 200)
+
+            columns = set(re.findall(r'"(\w+)"', ' '.join(queries)))
+            self.assertTrue('title' in columns)
+            self.assertTrue('author' in columns)
+            self.assertFalse('content' in columns)
+            self.assertFalse('description' in columns)
+
 
 def suite():
     "CMS test suite"
@@ -210,5 +1171,6 @@ def suite():
     )
     return test_suite
 
+
 if __name__ == '__main__':
     unittest.TextTestRunner(verbosity=2).run(suite())
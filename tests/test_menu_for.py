@@ -12,8 +12,11 @@ from ast import literal_eval
 
 import trytond.tests.test_tryton
 from trytond.tests.test_tryton import POOL, USER, DB_NAME, CONTEXT
+from nereid import request
 from nereid.testing import NereidTestCase
 from trytond.transaction import Transaction
+from trytond.exceptions import UserError
+from trytond.modules.nereid_cms.tests.helpers import patched, failing
 
 
 class TestMenuFor(NereidTestCase):
@@ -76,6 +79,37 @@ class TestMenuFor(NereidTestCase):
             'currencies': [('set', [usd.id])],
         }])
 
+    def setup_menu(self, model_name='product.category',
+                   children_field='childs', title_field='name',
+                   identifier_field='name'):
+        """
+        Creates the menu `identifier` of the website on the given model,
+        which uses the identifier field as the uri
+        """
+        Model = POOL.get('ir.model')
+        ModelField = POOL.get('ir.model.field')
+
+        model, = Model.search([('model', '=', model_name)])
+
+        def field(name):
+            field, = ModelField.search([
+                ('model', '=', model.id),
+                ('name', '=', name),
+            ])
+            return field.id
+
+        menu, = self.Menu.create([{
+            'name': 'menu1',
+            'unique_identifier': 'identifier',
+            'website': self.site1.id,
+            'model': model.id,
+            'children_field': field(children_field),
+            'uri_field': field(identifier_field),
+            'title_field': field(title_field),
+            'identifier_field': field(identifier_field),
+        }])
+        return menu
+
     def setUp(self):
         trytond.tests.test_tryton.install_module('nereid_cms')
         trytond.tests.test_tryton.install_module('product')
@@ -136,6 +170,413 @@ class TestMenuFor(NereidTestCase):
                 rv = literal_eval(response.data)
             self.assertTrue(rv['uri'], 'category-name')
 
+    def test_0020_menu_for_tree(self):
+        """
+        Generate the complete tree of a menu several levels deep
+        """
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app()
+
+            ProductCategory = POOL.get('product.category')
+
+            ProductCategory.create([{
+                'name': 'Category1',
+                'childs': [('create', [{
+                    'name': 'Category1-B',
+                }, {
+                    'name': 'Category1-A',
+                    'childs': [('create', [{
+                        'name': 'Category1-A-1',
+                    }])],
+                }])],
+            }])
+            self.setup_menu()
+
+            with app.test_client() as c:
+                response = c.get('/en_US/')
+                rv = literal_eval(response.data)
+
+            self.assertEqual(rv['name'], 'Category1')
+            self.assertEqual(
+                [child['name'] for child in rv['children']],
+                ['Category1-A', 'Category1-B']
+            )
+            child_a, child_b = rv['children']
+            self.assertEqual(child_a['children'], [{
+                'name': 'Category1-A-1',
+                'uri': 'Category1-A-1',
+                'children': [],
+            }])
+            self.assertEqual(child_b['children'], [])
+
+    def test_0030_menu_for_invalidation(self):
+        """
+        The cached menu tree is rebuilt when the menu or the model it is
+        built on changes.
+        """
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app(
+                CACHE_TYPE='werkzeug.contrib.cache.SimpleCache'
+            )
+
+            ProductCategory = POOL.get('product.category')
+            CacheVersion = POOL.get('nereid.cms.cache.version')
+            root, = ProductCategory.create([{
+                'name': 'Category1',
+                'childs': [('create', [{'name': 'Child1'}])],
+            }])
+            child, = root.childs
+            menu = self.setup_menu()
+
+            def get_children():
+                with app.test_client() as c:
+                    rv = literal_eval(c.get('/en_US/').data)
+                return [child['name'] for child in rv['children']]
+
+            self.assertEqual(get_children(), ['Child1'])
+
+            # The tree is served from the cache
+            ProductCategory.write([child], {'name': 'Child2'})
+            self.assertEqual(get_children(), ['Child1'])
+
+            # A change to the menu invalidates the cached tree
+            self.Menu.write([menu], {'description': 'Main menu'})
+            self.assertEqual(get_children(), ['Child2'])
+
+            # So does bumping the version of the model of the menu
+            ProductCategory.write([child], {'name': 'Child3'})
+            CacheVersion.bump(['product.category'])
+            self.assertEqual(get_children(), ['Child3'])
+
+    def test_0040_menu_for_cached_lookup(self):
+        """
+        A cached menu is served without searching for the menu or its
+        root item.
+        """
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app(
+                CACHE_TYPE='werkzeug.contrib.cache.SimpleCache'
+            )
+
+            ProductCategory = POOL.get('product.category')
+            ProductCategory.create([{'name': 'Category1'}])
+            self.setup_menu()
+
+            with app.test_client() as c:
+                first = c.get('/en_US/').data
+
+            fail = failing(self, 'The menu was looked up from the database')
+            with patched(self.Menu, search=fail), \
+                    patched(ProductCategory, search=fail):
+                with app.test_client() as c:
+                    second = c.get('/en_US/').data
+            self.assertEqual(literal_eval(first), literal_eval(second))
+
+    def test_0050_menu_for_request_memo(self):
+        """
+        Repeated calls to menu_for within a request are answered from the
+        request memo.
+        """
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app()
+
+            ProductCategory = POOL.get('product.category')
+            ProductCategory.create([{'name': 'Category1'}])
+            self.setup_menu()
+            self.templates['home.jinja'] = (
+                '{{ menu_for("identifier", "Category1")["name"] }}'
+                '{{ menu_for("identifier", "Category1")["name"] }}'
+                '{{ menu_for("identifier", "Category1")["name"] }}'
+            )
+
+            with app.test_client() as c:
+                response = c.get('/en_US/')
+                self.assertEqual(response.data, 'Category1' * 3)
+                self.assertEqual(request.nereid_cms_memo.misses, 1)
+                self.assertEqual(request.nereid_cms_memo.hits, 2)
+
+    def test_0060_menu_for_decoded_trees(self):
+        """
+        The serialized trees are decoded once per worker and only fetched
+        again when they are rebuilt.
+        """
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app(
+                CACHE_TYPE='werkzeug.contrib.cache.SimpleCache'
+            )
+
+            ProductCategory = POOL.get('product.category')
+            ProductCategory.create([{
+                'name': 'Category1',
+                'childs': [('create', [{'name': 'Child1'}])],
+            }])
+            menu = self.setup_menu()
+
+            def menu_for():
+                with app.test_request_context('/en_US/'):
+                    return self.Menu.menu_for('identifier', 'Category1')
+
+            first = menu_for()
+            self.assertEqual(
+                self.Menu._load_tree(self.Menu._dump_tree(first)), first
+            )
+
+            with patched(self.Menu, _load_tree=failing(
+                    self, 'The tree was decoded again')):
+                self.assertTrue(menu_for() is first)
+
+            # A rebuilt tree is decoded again
+            self.Menu.write([menu], {'description': 'Main menu'})
+            second = menu_for()
+            self.assertFalse(second is first)
+            self.assertEqual(second, first)
+
+    def test_0070_menu_for_depth_and_path(self):
+        """
+        Only the levels and the branch asked for are generated, and each
+        of them is cached separately.
+        """
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app(
+                CACHE_TYPE='werkzeug.contrib.cache.SimpleCache'
+            )
+
+            ProductCategory = POOL.get('product.category')
+            # An item of another tree with the same identifier
+            ProductCategory.create([{
+                'name': 'Other',
+                'childs': [('create', [{'name': 'A-1'}])],
+            }])
+            ProductCategory.create([{
+                'name': 'Category1',
+                'childs': [('create', [{
+                    'name': 'A',
+                    'childs': [('create', [{
+                        'name': 'A-1',
+                        'childs': [('create', [{'name': 'A-1-a'}])],
+                    }])],
+                }, {
+                    'name': 'B',
+                    'childs': [('create', [{'name': 'B-1'}])],
+                }])],
+            }])
+            self.setup_menu()
+
+            def names(node):
+                return [
+                    node['name'],
+                    [names(child) for child in node['children']],
+                ]
+
+            def menu_for(**kwargs):
+                with app.test_request_context('/en_US/'):
+                    return names(self.Menu.menu_for(
+                        'identifier', 'Category1', **kwargs
+                    ))
+
+            self.assertEqual(menu_for(max_depth=0), ['Category1', []])
+            self.assertEqual(
+                menu_for(max_depth=1),
+                ['Category1', [['A', []], ['B', []]]]
+            )
+            self.assertEqual(
+                menu_for(path='A-1'),
+                ['Category1', [
+                    ['A', [['A-1', [['A-1-a', []]]]]],
+                    ['B', []],
+                ]]
+            )
+            self.assertEqual(
+                menu_for(max_depth=2, path='A-1'),
+                ['Category1', [['A', [['A-1', []]]], ['B', []]]]
+            )
+            # An item which is not under the root only shows the top level
+            self.assertEqual(
+                menu_for(path='Unknown'),
+                ['Category1', [['A', []], ['B', []]]]
+            )
+            self.assertEqual(
+                menu_for(),
+                ['Category1', [
+                    ['A', [['A-1', [['A-1-a', []]]]]],
+                    ['B', [['B-1', []]]],
+                ]]
+            )
+
+    def test_0080_menuitem_nested_set(self):
+        """
+        Menu items keep a nested set, which gives their ancestors and
+        descendants with a single query.
+        """
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app()
+
+            MenuItem = POOL.get('nereid.cms.menuitem')
+
+            root, = MenuItem.create([{
+                'title': 'Root',
+                'unique_name': 'root',
+                'sequence': 1,
+                'child': [('create', [{
+                    'title': 'Products',
+                    'unique_name': 'products',
+                    'sequence': 1,
+                    'child': [('create', [{
+                        'title': 'Shoes',
+                        'unique_name': 'shoes',
+                        'sequence': 1,
+                    }])],
+                }, {
+                    'title': 'About',
+                    'unique_name': 'about',
+                    'sequence': 2,
+                }])],
+            }])
+            shoes, = MenuItem.search([('unique_name', '=', 'shoes')])
+            products, = MenuItem.search([('unique_name', '=', 'products')])
+            # Menu items without a link use the empty choice
+            self.assertTrue(('', '') in MenuItem.links_get())
+            self.assertEqual(root.reference, None)
+
+            self.assertTrue(root.left < products.left < shoes.left)
+            self.assertTrue(shoes.right < products.right < root.right)
+            self.assertEqual(
+                MenuItem.get_ancestor_ids([shoes]),
+                set([root.id, products.id, shoes.id])
+            )
+            self.assertEqual(
+                [item.unique_name for item in MenuItem.search([
+                    ('parent', 'child_of', [products.id]),
+                ], order=[('left', 'ASC')])],
+                ['products', 'shoes']
+            )
+            self.assertEqual(
+                shoes.rec_name, 'Root / Products / Shoes'
+            )
+            self.assertEqual(
+                MenuItem.get_rec_name([shoes, root], 'rec_name'),
+                {shoes.id: 'Root / Products / Shoes', root.id: 'Root'}
+            )
+
+            # Moving an item updates the nested set
+            MenuItem.write([shoes], {'parent': root.id})
+            self.assertEqual(
+                MenuItem.get_rec_name([shoes], 'rec_name'),
+                {shoes.id: 'Root / Shoes'}
+            )
+            self.assertEqual(
+                MenuItem.get_ancestor_ids([shoes]), set([root.id, shoes.id])
+            )
+
+            self.setup_menu(
+                'nereid.cms.menuitem', 'child', 'title', 'unique_name'
+            )
+
+            def names(node):
+                return [
+                    node['name'],
+                    [names(child) for child in node['children']],
+                ]
+
+            with app.test_request_context('/en_US/'):
+                self.assertEqual(
+                    names(self.Menu.menu_for('identifier', 'root')),
+                    ['Root', [
+                        ['Products', []], ['Shoes', []], ['About', []],
+                    ]]
+                )
+                self.assertEqual(
+                    names(self.Menu.menu_for(
+                        'identifier', 'root', path='products'
+                    )),
+                    ['Root', [
+                        ['Products', []], ['Shoes', []], ['About', []],
+                    ]]
+                )
+
+            # Recursive menu items are not allowed
+            with self.assertRaises(UserError) as raised:
+                MenuItem.write([root], {'parent': shoes.id})
+            self.assertEqual(
+                raised.exception.args[1][0],
+                'Error ! You can not create recursive menuitems.'
+            )
+
+    def test_0090_menuitem_tree_invalidation(self):
+        """
+        A change to a menu item only invalidates the cached menus built on
+        its tree.
+        """
+        with Transaction().start(DB_NAME, USER, CONTEXT):
+            self.setup_defaults()
+            app = self.get_app(
+                CACHE_TYPE='werkzeug.contrib.cache.SimpleCache'
+            )
+
+            MenuItem = POOL.get('nereid.cms.menuitem')
+
+            main, footer = MenuItem.create([{
+                'title': 'Main',
+                'unique_name': 'main',
+                'sequence': 1,
+                'child': [('create', [{
+                    'title': 'Products',
+                    'unique_name': 'products',
+                    'sequence': 1,
+                }])],
+            }, {
+                'title': 'Footer',
+                'unique_name': 'footer',
+                'sequence': 2,
+                'child': [('create', [{
+                    'title': 'About',
+                    'unique_name': 'about',
+                    'sequence': 1,
+                }])],
+            }])
+            products, = main.child
+            about, = footer.child
+            self.assertEqual(
+                MenuItem.get_tree_version_names([products, about, footer]),
+                ['nereid.cms.menuitem,%d' % main.id,
+                    'nereid.cms.menuitem,%d' % footer.id]
+            )
+
+            self.setup_menu(
+                'nereid.cms.menuitem', 'child', 'title', 'unique_name'
+            )
+
+            def get_children(root):
+                with app.test_request_context('/en_US/'):
+                    return [
+                        child['uri'] for child in
+                        self.Menu.menu_for('identifier', root)['children']
+                    ]
+
+            self.assertEqual(get_children('main'), ['products'])
+            self.assertEqual(get_children('footer'), ['about'])
+
+            # The footer changes behind the back of the cache
+            Transaction().cursor.execute(
+                'UPDATE "%s" SET unique_name = %%s WHERE id = %%s'
+                % MenuItem._table, ('company', about.id)
+            )
+            MenuItem.write([products], {'unique_name': 'shop'})
+            self.assertEqual(get_children('main'), ['shop'])
+            self.assertEqual(get_children('footer'), ['about'])
+
+            # Moving an item invalidates both of its trees
+            MenuItem.write([products], {'parent': footer.id})
+            self.assertEqual(get_children('main'), [])
+            self.assertEqual(get_children('footer'), ['shop', 'company'])
+
 
 def suite():
     suite = unittest.TestSuite()